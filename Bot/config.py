@@ -1,9 +1,146 @@
 import os
 
+# Settings below may be overridden from the environment or a .env file,
+# which main() loads before this module is first imported
+
 # Project paths
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DATABASE_PATH = os.path.join(os.path.dirname(__file__), 'database.json')
+DATABASE_PATH = os.getenv("DATABASE_PATH", os.path.join(os.path.dirname(__file__), 'database.json'))
+STORAGE_PATH = os.getenv("STORAGE_PATH", os.path.join(os.path.dirname(__file__), 'data', 'metamind.db'))
+STATE_STORE_PATH = os.getenv("STATE_STORE_PATH", os.path.join(os.path.dirname(__file__), 'data', 'state.db'))
 
 # Bot settings
 DEFAULT_PARSE_MODE = "Markdown"
-LOGGING_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
\ No newline at end of file
+LOGGING_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Logging settings
+LOG_FILE = os.getenv("LOG_FILE", os.path.join(os.path.dirname(__file__), 'logs', 'bot.log'))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # "text" or "json" (one object per line)
+LOG_ROTATION = os.getenv("LOG_ROTATION", "size").lower()  # "size" or "time"
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(5 * 1024 * 1024)))  # size rotation threshold
+LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN", "midnight")  # time rotation interval, as in TimedRotatingFileHandler
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))  # gzipped files kept
+
+# Storage settings
+# Chat that inherits links saved before links were owned per chat (0 = nobody)
+LEGACY_OWNER_CHAT_ID = int(os.getenv("LEGACY_OWNER_CHAT_ID", "0"))
+
+# Fetch pipeline settings
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "8"))  # concurrent fetches
+FETCH_QUEUE_SIZE = int(os.getenv("FETCH_QUEUE_SIZE", "200"))  # URLs waiting or in flight
+FETCH_CONNECT_TIMEOUT = float(os.getenv("FETCH_CONNECT_TIMEOUT", "5"))  # seconds
+FETCH_READ_TIMEOUT = float(os.getenv("FETCH_READ_TIMEOUT", "10"))  # seconds between reads
+FETCH_BUDGET = float(os.getenv("FETCH_BUDGET", "30"))  # seconds from submit to result
+FETCH_MAX_HEAD_BYTES = int(os.getenv("FETCH_MAX_HEAD_BYTES", str(256 * 1024)))  # bytes read per page
+FETCH_CHUNK_SIZE = 16 * 1024  # bytes per streamed read
+
+# HTML parsing settings
+PARSE_BACKEND = os.getenv("PARSE_BACKEND", "stream").lower()  # "stream", "lxml" or "bs4"
+# Parser processes, leaving one core to the bot (0 = parse on the fetch thread)
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(max(0, min(4, (os.cpu_count() or 1) - 1)))))
+
+# Metadata cache settings
+METADATA_CACHE_SIZE = int(os.getenv("METADATA_CACHE_SIZE", "5000"))  # URLs kept in memory
+METADATA_CACHE_TTL = float(os.getenv("METADATA_CACHE_TTL", "3600"))  # seconds before revalidation
+
+# HTTP client settings
+HTTP_USER_AGENT = os.getenv(
+    "HTTP_USER_AGENT",
+    "Mozilla/5.0 (compatible; MetaMindBot/1.0; +https://github.com/zenzer0s/MetaMind)"
+)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "100"))  # open connections across all hosts
+HTTP_PER_HOST_CONCURRENCY = int(os.getenv("HTTP_PER_HOST_CONCURRENCY", "4"))  # requests in flight per host
+HTTP_PER_HOST_RPS = float(os.getenv("HTTP_PER_HOST_RPS", "2"))  # request starts per second per host (0 = unlimited)
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))  # seconds
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))  # seconds an idle connection stays open
+
+# Listing settings
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "10"))  # links per /list and /del page
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "50000"))  # pre-rendered lines kept in memory
+SELECTION_TTL = int(os.getenv("SELECTION_TTL", "600"))  # seconds a /list numbering stays valid
+
+# Conversation state settings
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").lower()  # "memory" (one process) or "sqlite" (shared by several)
+STATE_PURGE_INTERVAL = float(os.getenv("STATE_PURGE_INTERVAL", "60"))  # seconds between deletes of expired sqlite rows
+DELETE_STATE_TTL = int(os.getenv("DELETE_STATE_TTL", "300"))  # seconds a /del selection stays valid
+
+# Failure handling settings
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))  # consecutive failures that open a host's circuit
+CIRCUIT_BASE_BACKOFF = float(os.getenv("CIRCUIT_BASE_BACKOFF", "30"))  # seconds the circuit first stays open
+CIRCUIT_MAX_BACKOFF = float(os.getenv("CIRCUIT_MAX_BACKOFF", "900"))  # longest open period in seconds
+NEGATIVE_CACHE_TTL = float(os.getenv("NEGATIVE_CACHE_TTL", "120"))  # seconds a failed URL is not refetched
+NEGATIVE_CACHE_SIZE = int(os.getenv("NEGATIVE_CACHE_SIZE", "10000"))  # failed URLs remembered
+
+# Update delivery settings
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()  # "polling" or "webhook"
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")  # e.g. a local Bot API server; empty = api.telegram.org
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")  # public base URL registered with Telegram
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")  # checked against X-Telegram-Bot-Api-Secret-Token; random if unset with WEBHOOK_URL
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))  # threads processing queued updates
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))  # updates buffered before answering 503
+
+# Handler dispatch settings
+DISPATCH_WORKERS = int(os.getenv("DISPATCH_WORKERS", "8"))  # chats handled in parallel
+DISPATCH_CHAT_QUEUE = int(os.getenv("DISPATCH_CHAT_QUEUE", "20"))  # queued updates per chat before blocking
+DISPATCH_MAX_PENDING = int(os.getenv("DISPATCH_MAX_PENDING", "2000"))  # queued updates overall before blocking
+
+# Rate limit settings
+RATE_LIMIT_USER_RATE = float(os.getenv("RATE_LIMIT_USER_RATE", "1"))  # updates per second per user
+RATE_LIMIT_USER_BURST = float(os.getenv("RATE_LIMIT_USER_BURST", "5"))
+RATE_LIMIT_GLOBAL_RATE = float(os.getenv("RATE_LIMIT_GLOBAL_RATE", "30"))  # updates per second overall
+RATE_LIMIT_GLOBAL_BURST = float(os.getenv("RATE_LIMIT_GLOBAL_BURST", "60"))
+RATE_LIMIT_FETCH_RATE = float(os.getenv("RATE_LIMIT_FETCH_RATE", "0.2"))  # link fetches per second per user
+RATE_LIMIT_FETCH_BURST = float(os.getenv("RATE_LIMIT_FETCH_BURST", "5"))
+RATE_LIMIT_IDLE_TTL = float(os.getenv("RATE_LIMIT_IDLE_TTL", "600"))  # seconds before an idle user's bucket is dropped
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))  # buckets kept at most per limit
+RATE_LIMIT_NOTICE_INTERVAL = float(os.getenv("RATE_LIMIT_NOTICE_INTERVAL", "30"))  # seconds between "slow down" replies to one user; must be > 0
+
+# AI enhancement settings
+AI_ENHANCEMENT_ENABLED = os.getenv("AI_ENHANCEMENT_ENABLED", "false").lower() in ("1", "true", "yes")
+AI_MODEL_NAME = os.getenv("AI_MODEL_NAME", "gemini-pro")
+AI_BATCH_SIZE = int(os.getenv("AI_BATCH_SIZE", "8"))  # links per model request
+AI_BATCH_WAIT = float(os.getenv("AI_BATCH_WAIT", "2"))  # seconds to wait for a batch to fill
+AI_QPS = float(os.getenv("AI_QPS", "0.5"))  # model requests per second; must be > 0
+AI_WORKERS = int(os.getenv("AI_WORKERS", "1"))  # model requests in flight
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "2000"))  # enhanced results remembered
+AI_QUEUE_SIZE = int(os.getenv("AI_QUEUE_SIZE", "500"))  # links waiting before new ones are skipped
+
+# Search settings
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "50"))  # matches returned by /search
+
+# Categorizer settings
+CATEGORY_HASH_BITS = int(os.getenv("CATEGORY_HASH_BITS", "18"))  # 2**bits hashed feature columns
+CATEGORY_MIN_SCORE = float(os.getenv("CATEGORY_MIN_SCORE", "1.0"))  # below this a link is "Other"; one keyword in the description is enough
+CATEGORY_BATCH_SIZE = int(os.getenv("CATEGORY_BATCH_SIZE", "5000"))  # links scored per batch
+CATEGORY_FIT_LINKS = int(os.getenv("CATEGORY_FIT_LINKS", "20000"))  # stored links the weights are fitted on at startup
+
+# Export settings
+EXPORT_TARGET = os.getenv("EXPORT_TARGET", "").lower()  # "sheets", "drive" or empty to disable
+EXPORT_INTERVAL = float(os.getenv("EXPORT_INTERVAL", "300"))  # seconds between export runs
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))  # changes per API call
+EXPORT_RPS = float(os.getenv("EXPORT_RPS", "1"))  # API requests per second (Sheets allows 60/min); must be > 0
+EXPORT_MAX_RETRIES = int(os.getenv("EXPORT_MAX_RETRIES", "5"))
+EXPORT_SPREADSHEET_ID = os.getenv("EXPORT_SPREADSHEET_ID", "")
+EXPORT_SHEET_NAME = os.getenv("EXPORT_SHEET_NAME", "Links")
+EXPORT_DRIVE_FOLDER_ID = os.getenv("EXPORT_DRIVE_FOLDER_ID", "")
+GOOGLE_CREDENTIALS_FILE = os.getenv("GOOGLE_CREDENTIALS_FILE", "credentials.json")  # service account key
+GOOGLE_ACCESS_TOKEN = os.getenv("GOOGLE_ACCESS_TOKEN", "")  # fixed token instead, e.g. for a fake API
+GOOGLE_SHEETS_API_URL = os.getenv("GOOGLE_SHEETS_API_URL", "https://sheets.googleapis.com")
+GOOGLE_DRIVE_API_URL = os.getenv("GOOGLE_DRIVE_API_URL", "https://www.googleapis.com")
+
+# Import settings
+IMPORT_CONCURRENCY = int(os.getenv("IMPORT_CONCURRENCY", "16"))  # link fetches in flight per import
+IMPORT_COMMIT_BATCH = int(os.getenv("IMPORT_COMMIT_BATCH", "200"))  # links saved per transaction
+IMPORT_PROGRESS_INTERVAL = float(os.getenv("IMPORT_PROGRESS_INTERVAL", "3"))  # seconds between progress edits
+IMPORT_MAX_FILE_SIZE = int(os.getenv("IMPORT_MAX_FILE_SIZE", str(20 * 1024 * 1024)))  # Bot API download limit
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "65536"))  # bytes read from the download at a time
+
+# Metrics settings
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")  # keep the endpoint local unless it is scraped remotely
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # port for /metrics in the Prometheus format (0 = off)
+# Comma-separated chat ids allowed to use /stats
+ADMIN_CHAT_IDS = frozenset(int(chat_id) for chat_id in os.getenv("ADMIN_CHAT_IDS", "").split(",") if chat_id.strip())
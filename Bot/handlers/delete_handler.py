@@ -1,86 +1,102 @@
-import json
-import os
 import logging
-import time
 import re  # Added import
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from config import DELETE_STATE_TTL
+from utils.metrics import stage
+from utils.state_store import get_state_store
+from utils.storage import VersionConflict, get_store
+from handlers.pagination import build_page_keyboard, parse_page, render_snapshot_page
 
 logger = logging.getLogger(__name__)
 
-# Store states for delete confirmation
-delete_states: Dict[int, Any] = {}
+# State-store namespace of each chat's /del session and pending confirmation
+DELETE_NAMESPACE = 'delete'
+
+def get_delete_state(chat_id: int) -> Optional[Dict[str, Any]]:
+    """Return the chat's live /del session, or None if there is none or it expired."""
+    return get_state_store().get(DELETE_NAMESPACE, chat_id)
+
+def save_delete_state(chat_id: int, state: Dict[str, Any]) -> None:
+    """Write back a /del session; every change keeps it alive for another DELETE_STATE_TTL."""
+    get_state_store().set(DELETE_NAMESPACE, chat_id, state, DELETE_STATE_TTL)
+
+def clear_delete_state(chat_id: int) -> None:
+    get_state_store().delete(DELETE_NAMESPACE, chat_id)
 
 def handle_delete_command(bot, message):
     """Handle the /delete command."""
     try:
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database.json')
-        
-        if not os.path.exists(db_path) or not json.load(open(db_path, 'r')):
+        chat_id = message.chat.id
+        with stage('delete', 'query'):
+            state = open_delete_state(chat_id)
+
+        if not state['ids']:
+            clear_delete_state(chat_id)
             bot.reply_to(message, "❌ No links stored to delete.")
             return
 
-        with open(db_path, 'r') as f:
-            data = json.load(f)
+        with stage('delete', 'render'):
+            response, keyboard = render_delete_page(chat_id, state, 0)
 
-        # Cache the data
-        delete_states[message.chat.id] = {
-            'data': data,
-            'awaiting_confirmation': False,
-            'timestamp': time.time()
-        }
+        with stage('delete', 'reply'):
+            bot.send_message(
+                message.chat.id,
+                response,
+                parse_mode="Markdown",
+                disable_web_page_preview=True,
+                reply_markup=keyboard
+            )
 
-        response = format_delete_message(data)
+    except Exception as e:
+        logger.error("Error in delete command: %s", e)
+        bot.reply_to(message, "⚠️ An error occurred while retrieving links.")
 
-        bot.send_message(
-            message.chat.id,
-            response,
-            parse_mode="Markdown",
-            disable_web_page_preview=True
-        )
+def handle_delete_page(bot, call):
+    """Handle prev/next buttons under a /del message."""
+    try:
+        chat_id = call.message.chat.id
+        state = get_delete_state(chat_id) or open_delete_state(chat_id)
+        with stage('delete', 'render'):
+            response, keyboard = render_delete_page(chat_id, state, parse_page(call.data))
+
+        with stage('delete', 'reply'):
+            bot.edit_message_text(
+                response,
+                chat_id,
+                call.message.message_id,
+                parse_mode="Markdown",
+                disable_web_page_preview=True,
+                reply_markup=keyboard
+            )
+        bot.answer_callback_query(call.id)
 
     except Exception as e:
-        logger.error(f"Error in delete command: {e}")
-        bot.reply_to(message, "⚠️ An error occurred while retrieving links.")
+        logger.error("[DELETE] Error in delete paging: %s", e)
+        bot.answer_callback_query(call.id, "⚠️ Could not load that page.")
 
 def handle_delete_selection(bot, message):
     try:
         chat_id = message.chat.id
         user_input = message.text.strip().lower()
-        logger.info(f"[DELETE] New input received: '{user_input}' from chat_id: {chat_id}")
+        logger.info("[DELETE] New input received: '%s' from chat_id: %s", user_input, chat_id)
 
-        if chat_id not in delete_states:
-            logger.warning(f"[DELETE] State not found for chat_id: {chat_id}")
+        state = get_delete_state(chat_id)
+        if state is None:
+            logger.warning("[DELETE] State not found for chat_id: %s", chat_id)
             bot.reply_to(message, "❌ Please use /del or /delete command first.")
             return
 
-        state = delete_states[chat_id]
-
         # Handle confirmation for multiple deletions
         if state.get('awaiting_confirmation'):
             if user_input == 'yes':
-                numbers = state.get('pending_numbers', [])
-                urls = list(state['data'].keys())
-                deleted_items = []
-
-                for num in numbers:
-                    if 1 <= num <= len(urls):
-                        url = urls[num - 1]
-                        title = state['data'][url]['metadata']['title']
-                        deleted_items.append(title)
-                        state['data'].pop(url)
-                        logger.info(f"[DELETE] Successfully deleted item {num}: {title}")
-
-                # Save changes
-                db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database.json')
-                with open(db_path, 'w') as f:
-                    json.dump(state['data'], f, indent=4)
-
-                response = "✅ Deleted:\n" + "\n".join(f"{i}. *{title}*" for i, title in enumerate(deleted_items, 1))
-                bot.reply_to(message, response, parse_mode="Markdown")
+                deleted_items = commit_deletion(bot, message, state, state.get('pending_ids', []))
+                if deleted_items:
+                    response = "✅ Deleted:\n" + "\n".join(f"{i}. *{title}*" for i, title in enumerate(deleted_items, 1))
+                    bot.reply_to(message, response, parse_mode="Markdown")
             else:
                 bot.reply_to(message, "❌ Deletion cancelled.")
             
-            delete_states.pop(chat_id)
+            clear_delete_state(chat_id)
             return
 
         # Handle new number input
@@ -91,9 +107,9 @@ def handle_delete_selection(bot, message):
             try:
                 num = int(part)
                 numbers.append(num)
-                logger.info(f"[DELETE] Parsed number: {num}")
+                logger.info("[DELETE] Parsed number: %s", num)
             except ValueError:
-                logger.warning(f"[DELETE] Invalid number: {part}")
+                logger.warning("[DELETE] Invalid number: %s", part)
                 continue
 
         if not numbers:
@@ -102,16 +118,26 @@ def handle_delete_selection(bot, message):
             return
 
         # Validate numbers
-        if any(num < 1 or num > len(state['data']) for num in numbers):
+        ids = state['ids']
+        if any(num < 1 or num > len(ids) for num in numbers):
             logger.warning("[DELETE] Numbers out of range")
             bot.reply_to(message, "❌ Invalid number(s). Please choose from the list.")
             return
 
+        # Resolve every number to its stable record id in one pass
+        selected_ids = list(dict.fromkeys(ids[num - 1] for num in numbers))
+        records = get_store().get_many(chat_id, selected_ids)
+        if len(records) != len(selected_ids):
+            bot.reply_to(message, "❌ Some of those links were already deleted. Please use /del again.")
+            clear_delete_state(chat_id)
+            return
+
         # Request confirmation for multiple deletions
-        if len(numbers) > 1:
-            state['pending_numbers'] = numbers
+        if len(selected_ids) > 1:
+            state['pending_ids'] = selected_ids
             state['awaiting_confirmation'] = True
-            titles = [state['data'][list(state['data'].keys())[n-1]]['metadata']['title'] for n in numbers]
+            save_delete_state(chat_id, state)
+            titles = [records[record_id]['metadata']['title'] for record_id in selected_ids]
             confirm_text = "*❓ Confirm deletion of these items:*\n\n"
             for i, title in enumerate(titles, 1):
                 confirm_text += f"{i}. *{title}*\n"
@@ -121,43 +147,52 @@ def handle_delete_selection(bot, message):
             return
 
         # Handle single deletion
-        url = list(state['data'].keys())[numbers[0] - 1]
-        title = state['data'][url]['metadata']['title']
-        state['data'].pop(url)
-
-        # Save changes
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database.json')
-        with open(db_path, 'w') as f:
-            json.dump(state['data'], f, indent=4)
-
-        bot.reply_to(message, f"✅ Deleted: *{title}*", parse_mode="Markdown")
-        delete_states.pop(chat_id)
+        deleted_items = commit_deletion(bot, message, state, selected_ids)
+        if deleted_items:
+            bot.reply_to(message, f"✅ Deleted: *{deleted_items[0]}*", parse_mode="Markdown")
+        clear_delete_state(chat_id)
 
     except Exception as e:
-        logger.error(f"[DELETE] Error in delete selection: {str(e)}", exc_info=True)
+        logger.error("[DELETE] Error in delete selection: %s", e, exc_info=True)
         bot.reply_to(message, "⚠️ An error occurred while deleting.")
 
-def cleanup_delete_states() -> None:
-    """Remove old delete states after timeout."""
+def open_delete_state(chat_id: int) -> Dict[str, Any]:
+    """Snapshot a chat's record ids and version for a /del session."""
+    store = get_store()
+    # Read the version first: a delete racing with the snapshot then fails the check
+    version = store.version(chat_id)
+    state = {
+        'ids': store.ids(chat_id),
+        'version': version,
+        'awaiting_confirmation': False
+    }
+    save_delete_state(chat_id, state)
+    return state
+
+def commit_deletion(bot, message, state: Dict[str, Any], ids: List[int]) -> List[str]:
+    """Delete the selected ids as one batch and return the deleted titles.
+
+    The batch only applies if nothing was deleted in the chat since /del was
+    issued; otherwise the user is asked to start over.
+    """
     try:
-        current_time = time.time()
-        timeout = 300  # 5 minutes timeout
-
-        # Find expired states
-        expired_chats = [
-            chat_id for chat_id, state in delete_states.items()
-            if current_time - state.get('timestamp', 0) > timeout
-        ]
-
-        # Remove expired states
-        for chat_id in expired_chats:
-            delete_states.pop(chat_id, None)
-            logger.info(f"[DELETE] Cleaned up expired state for chat_id: {chat_id}")
-
-    except Exception as e:
-        logger.error(f"[DELETE] Error in cleanup: {str(e)}")
-
-def format_delete_message(data: dict) -> str:
+        with stage('delete', 'delete'):
+            deleted = get_store().delete_many(message.chat.id, ids, expected_version=state['version'])
+    except VersionConflict:
+        logger.info("[DELETE] Stale selection in chat_id: %s", message.chat.id)
+        bot.reply_to(message, "❌ Your links changed since you opened the list. Please use /del again.")
+        return []
+
+    logger.info("[DELETE] Successfully deleted %s item(s)", len(deleted))
+    return [record['metadata']['title'] for record in deleted]
+
+def render_delete_page(chat_id: int, state: Dict[str, Any], page: int):
+    """Render one page of a /del snapshot and its navigation keyboard."""
+    items, page, pages = render_snapshot_page(chat_id, state['ids'], page, 'delete')
+    response = format_delete_message(items, page, pages)
+    return response, build_page_keyboard('del', page, pages)
+
+def format_delete_message(items: str, page: int = 0, pages: int = 1) -> str:
     """Format delete selection message with better UI."""
     response = (
         "*🗑️ Delete Links*\n\n"
@@ -167,10 +202,5 @@ def format_delete_message(data: dict) -> str:
         "  └ Example: `1,2,3` or `1 2 3`\n\n"
         "*Available Links:*\n\n"
     )
-    
-    for index, (url, info) in enumerate(data.items(), 1):
-        title = info['metadata'].get('title', 'No title')
-        title = f"{title[:50]}..." if len(title) > 50 else title
-        response += f"*{index}.* [{title}]({url})\n\n"
-    
-    return response
\ No newline at end of file
+
+    return response + items + f"\n\n_Page {page + 1}/{pages}_"
\ No newline at end of file
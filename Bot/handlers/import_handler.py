@@ -0,0 +1,103 @@
+import logging
+import threading
+import time
+import requests
+from telebot import apihelper
+from utils.importer import ImportStats, LinkImporter, iter_links
+from config import IMPORT_CHUNK_SIZE, IMPORT_MAX_FILE_SIZE
+
+logger = logging.getLogger(__name__)
+
+IMPORT_EXTENSIONS = ('.txt', '.csv', '.html', '.htm')
+
+# Chats with an import running; one at a time per chat
+active_imports = set()
+active_imports_lock = threading.Lock()
+
+def file_download_url(token, file_path):
+    """Build the download URL the same way telebot's download_file does."""
+    template = apihelper.FILE_URL or "https://api.telegram.org/file/bot{0}/{1}"
+    return template.format(token, file_path)
+
+def format_import_progress(stats: ImportStats, done: bool) -> str:
+    elapsed = time.monotonic() - stats.started
+    header = "✅ *Import finished*" if done else "📥 *Importing links...*"
+    lines = [
+        header,
+        f"Found: {stats.found}",
+        f"Saved: {stats.saved}",
+        f"Already saved: {stats.duplicates}",
+    ]
+    if stats.failed:
+        lines.append(f"Could not fetch: {stats.failed}")
+    if stats.invalid:
+        lines.append(f"Invalid: {stats.invalid}")
+    lines.append(f"_{stats.processed} processed in {elapsed:.0f}s_")
+    return "\n".join(lines)
+
+def handle_import_document(bot, message):
+    """Handle an uploaded .txt, .csv or bookmarks .html file by importing every link in it."""
+    claimed = False
+    try:
+        document = message.document
+        name = document.file_name or ''
+        if not name.lower().endswith(IMPORT_EXTENSIONS):
+            bot.reply_to(message, "📄 Send a .txt, .csv or browser bookmarks .html file to import links.")
+            return
+        if document.file_size and document.file_size > IMPORT_MAX_FILE_SIZE:
+            bot.reply_to(message, f"⚠️ File is too large to import (limit {IMPORT_MAX_FILE_SIZE // (1024 * 1024)} MB).")
+            return
+
+        chat_id = message.chat.id
+        with active_imports_lock:
+            if chat_id in active_imports:
+                bot.reply_to(message, "⏳ An import is already running in this chat. Please wait for it to finish.")
+                return
+            active_imports.add(chat_id)
+            claimed = True
+
+        status = bot.reply_to(message, "📥 *Importing links...*", parse_mode="Markdown")
+        # Imports take minutes; run them off the dispatcher so the chat stays responsive
+        threading.Thread(
+            target=run_import,
+            args=(bot, chat_id, document, status),
+            name=f'import-{chat_id}',
+            daemon=True
+        ).start()
+
+    except Exception as e:
+        logger.error("Error starting import: %s", e)
+        # Only release the chat if this call claimed it, not another import that is running
+        if claimed:
+            with active_imports_lock:
+                active_imports.discard(message.chat.id)
+        bot.reply_to(message, "⚠️ An error occurred while starting the import.")
+
+def run_import(bot, chat_id, document, status):
+    """Download the document as a stream and import its links, editing the status message as it goes."""
+    last_text = [None]
+
+    def on_progress(stats, done):
+        text = format_import_progress(stats, done)
+        if text != last_text[0]:
+            last_text[0] = text
+            bot.edit_message_text(text, status.chat.id, status.message_id, parse_mode="Markdown")
+
+    try:
+        file_path = bot.get_file(document.file_id).file_path
+        with requests.get(file_download_url(bot.token, file_path), stream=True, timeout=30) as response:
+            response.raise_for_status()
+            links = iter_links(response.iter_content(IMPORT_CHUNK_SIZE), document.file_name or '')
+            stats = LinkImporter(chat_id, on_progress).run(links)
+        logger.info("Imported %s of %s links for chat %s", stats.saved, stats.found, chat_id)
+
+    except Exception as e:
+        logger.error("Import failed for chat %s: %s", chat_id, e)
+        try:
+            bot.edit_message_text("⚠️ The import stopped because of an error. Links saved so far are kept.",
+                                  status.chat.id, status.message_id)
+        except Exception:
+            pass
+    finally:
+        with active_imports_lock:
+            active_imports.discard(chat_id)
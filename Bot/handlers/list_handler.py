@@ -1,67 +1,101 @@
-import json
-import os
 import logging
-from telebot.handler_backends import State
+from utils.categorizer import find_category
+from utils.sessions import SessionRegistry
+from utils.metrics import stage
+from utils.storage import get_store
+from handlers.pagination import build_page_keyboard, parse_page, parse_scope, render_snapshot_page
 
 logger = logging.getLogger(__name__)
 
-# Store global reference to data
-cached_data = {}
+# Numbering shown by each chat's last /list, used for number selection
+list_sessions = SessionRegistry('list')
 
 def handle_list_command(bot, message):
-    """Handle the /list command by displaying numbered links."""
+    """Handle /list [category] by displaying the first page of numbered links."""
     try:
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database.json')
-        
-        if not os.path.exists(db_path):
-            bot.reply_to(message, "❌ No links have been stored yet.")
+        parts = message.text.split(maxsplit=1)
+        category = None
+        if len(parts) > 1:
+            category = find_category(parts[1])
+            if not category:
+                bot.reply_to(message, format_categories(message.chat.id, parts[1]), parse_mode="Markdown")
+                return
+
+        with stage('list', 'query'):
+            ids = get_store().ids(message.chat.id, category)
+        if not ids:
+            if category:
+                bot.reply_to(message, f"📝 No links in *{category}* yet.", parse_mode="Markdown")
+            else:
+                bot.reply_to(message, "📝 No links have been stored yet.")
             return
 
-        with open(db_path, 'r') as f:
-            data = json.load(f)
+        session = list_sessions.open(message.chat.id, ids, 'list', category)
+        with stage('list', 'render'):
+            response, keyboard = render_list_page(message.chat.id, session, 0)
 
-        if not data:
-            bot.reply_to(message, "📝 No links have been stored yet.")
-            return
-
-        # Cache the data for number selection
-        global cached_data
-        cached_data = data
-
-        response = format_list_message(data)
+        with stage('list', 'reply'):
+            bot.send_message(
+                message.chat.id,
+                response,
+                parse_mode="Markdown",
+                disable_web_page_preview=True,
+                reply_markup=keyboard
+            )
 
-        if len(response) > 4000:
-            response = response[:3900] + "\n\n_(Some links not shown due to length limit)_"
+    except Exception as e:
+        logger.error("Error in list command: %s", e)
+        bot.reply_to(message, "⚠️ An error occurred while retrieving the links.")
 
-        bot.send_message(
-            message.chat.id,
-            response,
-            parse_mode="Markdown",
-            disable_web_page_preview=True
-        )
+def handle_list_page(bot, call):
+    """Handle prev/next buttons under a /list message."""
+    try:
+        chat_id = call.message.chat.id
+        # The button carries the message's category; reopen that listing if the
+        # session expired or a /search or another /list replaced it since
+        category = find_category(parse_scope(call.data))
+        session = list_sessions.get(chat_id, 'list')
+        if session is None or session.category != category:
+            session = list_sessions.open(chat_id, get_store().ids(chat_id, category), 'list', category)
+        with stage('list', 'render'):
+            response, keyboard = render_list_page(chat_id, session, parse_page(call.data))
+
+        with stage('list', 'reply'):
+            bot.edit_message_text(
+                response,
+                chat_id,
+                call.message.message_id,
+                parse_mode="Markdown",
+                disable_web_page_preview=True,
+                reply_markup=keyboard
+            )
+        bot.answer_callback_query(call.id)
 
     except Exception as e:
-        logger.error(f"Error in list command: {e}")
-        bot.reply_to(message, "⚠️ An error occurred while retrieving the links.")
+        logger.error("Error in list paging: %s", e)
+        bot.answer_callback_query(call.id, "⚠️ Could not load that page.")
 
-def handle_number_selection(message):
+def handle_number_selection(bot, message):
     """Handle numeric selection to show full details of a specific link."""
     try:
-        from telebot import TeleBot
-        bot = TeleBot(os.getenv("BOT_TOKEN"))
-        
         number = int(message.text)
-        if not cached_data:
+        session = list_sessions.get(message.chat.id)
+        if not session:
             bot.reply_to(message, "❌ Please use /list command first.")
             return
 
-        if number < 1 or number > len(cached_data):
+        record_id = session.resolve(number)
+        if record_id is None:
             bot.reply_to(message, "❌ Invalid number. Please choose from the list.")
             return
 
         # Get the selected item
-        url = list(cached_data.keys())[number - 1]
-        info = cached_data[url]
+        info = get_store().get_many(message.chat.id, [record_id]).get(record_id)
+        if not info:
+            bot.reply_to(message, "❌ That link has been deleted.")
+            return
+
+        url = info['url']
         metadata = info['metadata']
 
         # Format detailed response
@@ -80,28 +114,30 @@ def handle_number_selection(message):
         )
 
     except Exception as e:
-        logger.error(f"Error handling number selection: {e}")
+        logger.error("Error handling number selection: %s", e)
         bot.reply_to(message, "⚠️ An error occurred while retrieving the details.")
 
-def format_list_message(data: dict) -> str:
-    """Format stored links with better visual hierarchy."""
+def render_list_page(chat_id: int, session, page: int):
+    """Render one page of a session's numbering and its navigation keyboard."""
+    items, page, pages = render_snapshot_page(chat_id, session.ids, page, 'list')
+    response = format_list_message(items, page, pages, len(session))
+    return response, build_page_keyboard('list', page, pages, session.category or '')
+
+def format_list_message(items: str, page: int = 0, pages: int = 1, total: int = 0) -> str:
+    """Format a page of stored links with better visual hierarchy."""
     response = "*📚 Stored Links*\n\n"
-    
-    if not data:
+
+    if not items:
         return response + "_No links saved yet. Send me a URL to get started!_"
-    
-    for index, (url, info) in enumerate(data.items(), 1):
-        metadata = info['metadata']
-        title = metadata.get('title', 'No title')
-        desc = metadata.get('description', 'No description')
-        
-        # Truncate long texts
-        title = f"{title[:50]}..." if len(title) > 50 else title
-        desc = f"{desc[:100]}..." if len(desc) > 100 else desc
-        
-        response += (
-            f"*{index}.* [{title}]({url})\n"
-            f"└ _{desc}_\n\n"
+
+    return response + items + f"\n\n_Page {page + 1}/{pages} · {total} links_"
+
+def format_categories(chat_id: int, requested: str) -> str:
+    """Explain an unknown category and list the chat's categories."""
+    counts = get_store().categories(chat_id)
+    response = f"🏷️ There is no category called _{requested.strip()}_."
+    if counts:
+        response += "\n\n*Your categories:*\n" + "\n".join(
+            f"• `/list {category.lower()}` ({count})" for category, count in counts
         )
-    
-    return response
\ No newline at end of file
+    return response
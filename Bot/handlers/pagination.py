@@ -0,0 +1,58 @@
+from typing import Optional, Sequence, Tuple
+from telebot.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from config import LIST_PAGE_SIZE
+from utils.render_cache import get_render_cache
+from utils.storage import get_store
+
+def page_bounds(total: int, page: int, page_size: int = LIST_PAGE_SIZE) -> Tuple[int, int, int]:
+    """Clamp a page number and return ``(page, pages, offset)``."""
+    pages = max(1, -(-total // page_size))
+    page = min(max(page, 0), pages - 1)
+    return page, pages, page * page_size
+
+def build_page_keyboard(prefix: str, page: int, pages: int, scope: str = '') -> Optional[InlineKeyboardMarkup]:
+    """Build prev/next buttons whose callback data is ``<prefix>:<page>``, or ``<prefix>:<page>:<scope>``."""
+    if pages <= 1:
+        return None
+
+    suffix = f":{scope}" if scope else ''
+    buttons = []
+    if page > 0:
+        buttons.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"{prefix}:{page - 1}{suffix}"))
+    buttons.append(InlineKeyboardButton(f"{page + 1}/{pages}", callback_data=f"{prefix}:{page}{suffix}"))
+    if page < pages - 1:
+        buttons.append(InlineKeyboardButton("Next ➡️", callback_data=f"{prefix}:{page + 1}{suffix}"))
+
+    keyboard = InlineKeyboardMarkup()
+    keyboard.row(*buttons)
+    return keyboard
+
+def render_snapshot_page(chat_id: int, ids: Sequence[int], page: int, style: str) -> Tuple[str, int, int]:
+    """Render one page of a numbered id snapshot and return ``(items, page, pages)``.
+
+    Only the page's rows are read. Links deleted since the snapshot was taken
+    keep their number but are no longer shown.
+    """
+    page, pages, offset = page_bounds(len(ids), page)
+    page_ids = list(ids[offset:offset + LIST_PAGE_SIZE])
+    records = get_store().get_many(chat_id, page_ids)
+
+    items = get_render_cache().render_numbered(
+        ((number, records[record_id]) for number, record_id in enumerate(page_ids, offset + 1)
+         if record_id in records),
+        style
+    )
+    return items, page, pages
+
+def parse_page(data: str) -> int:
+    """Read the page number from ``<prefix>:<page>[:<scope>]`` callback data."""
+    try:
+        return int(data.split(':', 2)[1])
+    except (IndexError, ValueError):
+        return 0
+
+def parse_scope(data: str) -> str:
+    """Read the scope from ``<prefix>:<page>:<scope>`` callback data, or '' without one."""
+    parts = data.split(':', 2)
+    return parts[2] if len(parts) > 2 else ''
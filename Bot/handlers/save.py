@@ -0,0 +1,82 @@
+import logging
+import time
+from typing import Any, Dict
+from telebot.types import Message
+from config import AI_ENHANCEMENT_ENABLED
+from utils.fetcher import get_pipeline, PipelineFull
+from utils.messages import SUCCESS_MESSAGES, ERROR_MESSAGES
+from utils.metadata import store_metadata
+from utils.metrics import STAGE_BYTES, STAGE_SECONDS, stage
+from utils.rate_limiter import get_rate_limiter
+from utils.storage import get_store
+from utils.urls import extract_url, sanitize_url
+
+logger = logging.getLogger(__name__)
+
+def handle_link(bot, message: Message) -> None:
+    """Handle messages containing URLs."""
+    started = time.perf_counter()
+    try:
+        url = sanitize_url(extract_url(message.text) or '')
+        if not url:
+            bot.reply_to(message, ERROR_MESSAGES['invalid_url'])
+            return
+
+        logger.info("Extracted URL: %s", url)
+
+        # Answer duplicates from the canonical URL index without fetching
+        with stage('save', 'lookup'):
+            existing = get_store().find_canonical(message.chat.id, url)
+        if existing:
+            response = SUCCESS_MESSAGES['link_exists'].format(
+                title=existing['metadata'].get('title') or 'No title'
+            )
+            bot.reply_to(message, response, parse_mode="Markdown")
+            return
+
+        if not get_rate_limiter().allow_fetch(message.from_user.id):
+            bot.reply_to(message, ERROR_MESSAGES['fetch_rate_limited'])
+            return
+
+        status = bot.reply_to(message, SUCCESS_MESSAGES['link_saving'])
+
+        try:
+            get_pipeline().submit(url, lambda metadata: finish_link(bot, message, status, url, metadata, started))
+        except PipelineFull:
+            bot.edit_message_text(ERROR_MESSAGES['fetch_busy'], status.chat.id, status.message_id)
+
+    except Exception as e:
+        logger.error("Error processing link: %s", e)
+        bot.reply_to(message, ERROR_MESSAGES['general_error'])
+
+def finish_link(bot, message: Message, status: Message, url: str, metadata: Dict[str, Any], started: float) -> None:
+    """Store fetched metadata and update the "saving" reply with the outcome."""
+    try:
+        if "error" in metadata:
+            logger.warning("Metadata fetch failed for %s: %s", url, metadata['error'])
+            response = ERROR_MESSAGES['metadata_error']
+            parse_mode = None
+        else:
+            # Store the metadata
+            with stage('save', 'store'):
+                record_id = store_metadata(message.chat.id, url, metadata)
+
+            # Polish title and description in the background; the record updates when done
+            if AI_ENHANCEMENT_ENABLED:
+                from utils.ai_helper import get_enhancement_queue
+                get_enhancement_queue().submit(message.chat.id, record_id, metadata)
+
+            # Format success message
+            response = SUCCESS_MESSAGES['link_added'].format(
+                title=metadata.get('title', 'No title')
+            )
+            parse_mode = "Markdown"
+
+        with stage('save', 'reply'):
+            bot.edit_message_text(response, status.chat.id, status.message_id, parse_mode=parse_mode)
+        STAGE_BYTES.inc('save', 'reply', amount=len(response.encode('utf-8')))
+        STAGE_SECONDS.observe(time.perf_counter() - started, 'save', 'total')
+
+    except Exception as e:
+        logger.error("Error finishing link %s: %s", url, e)
+        bot.edit_message_text(ERROR_MESSAGES['general_error'], status.chat.id, status.message_id)
@@ -0,0 +1,78 @@
+import logging
+from array import array
+from utils.metrics import stage
+from utils.storage import get_store
+from config import SEARCH_MAX_RESULTS
+from handlers.list_handler import list_sessions
+from handlers.pagination import build_page_keyboard, parse_page, render_snapshot_page
+
+logger = logging.getLogger(__name__)
+
+def handle_search_command(bot, message):
+    """Handle /search <terms> by listing the best matching links, numbered like /list."""
+    try:
+        parts = message.text.split(maxsplit=1)
+        query = parts[1].strip() if len(parts) > 1 else ''
+        if not query:
+            bot.reply_to(message, "🔎 Usage: /search <words>\nExample: `/search python tutorial`",
+                         parse_mode="Markdown")
+            return
+
+        with stage('search', 'query'):
+            matches = get_store().search(message.chat.id, query, SEARCH_MAX_RESULTS)
+        if not matches:
+            bot.reply_to(message, f"🔎 No saved links match \"{query}\".")
+            return
+
+        # Numbers picked after a search refer to its results
+        session = list_sessions.open(message.chat.id, array('q', (record['id'] for record in matches)), 'search')
+        response, keyboard = render_search_page(message.chat.id, session, 0)
+
+        with stage('search', 'reply'):
+            bot.send_message(
+                message.chat.id,
+                response,
+                parse_mode="Markdown",
+                disable_web_page_preview=True,
+                reply_markup=keyboard
+            )
+
+    except Exception as e:
+        logger.error("Error in search command: %s", e)
+        bot.reply_to(message, "⚠️ An error occurred while searching your links.")
+
+def handle_search_page(bot, call):
+    """Handle prev/next buttons under a /search result message."""
+    try:
+        chat_id = call.message.chat.id
+        # A /list opened since then replaced the results
+        session = list_sessions.get(chat_id, 'search')
+        if not session:
+            bot.answer_callback_query(call.id, "⌛ These results expired. Please search again.")
+            return
+
+        response, keyboard = render_search_page(chat_id, session, parse_page(call.data))
+        with stage('search', 'reply'):
+            bot.edit_message_text(
+                response,
+                chat_id,
+                call.message.message_id,
+                parse_mode="Markdown",
+                disable_web_page_preview=True,
+                reply_markup=keyboard
+            )
+        bot.answer_callback_query(call.id)
+
+    except Exception as e:
+        logger.error("Error in search paging: %s", e)
+        bot.answer_callback_query(call.id, "⚠️ Could not load that page.")
+
+def render_search_page(chat_id: int, session, page: int):
+    """Render one page of search results and its navigation keyboard."""
+    items, page, pages = render_snapshot_page(chat_id, session.ids, page, 'list')
+    response = (
+        "*🔎 Search Results*\n\n"
+        + (items or "_These links have been deleted._")
+        + f"\n\n_Page {page + 1}/{pages} · {len(session)} matches_"
+    )
+    return response, build_page_keyboard('search', page, pages)
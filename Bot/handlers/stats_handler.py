@@ -0,0 +1,71 @@
+import logging
+import time
+from collections import defaultdict
+from config import ADMIN_CHAT_IDS
+from utils.metrics import CACHE_REQUESTS, FETCHES, STAGE_SECONDS, registry
+
+logger = logging.getLogger(__name__)
+
+# Hosts listed under fetch errors
+TOP_ERROR_HOSTS = 5
+
+def is_admin(message) -> bool:
+    user_id = message.from_user.id if message.from_user else None
+    return message.chat.id in ADMIN_CHAT_IDS or user_id in ADMIN_CHAT_IDS
+
+def format_duration(seconds: float) -> str:
+    if seconds < 0.01:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+def format_stats() -> str:
+    """Summarize latencies, fetch outcomes, cache hit ratios and queue depths."""
+    uptime = int(time.time() - registry.started)
+    lines = [f"📊 Stats (up {uptime // 3600}h {uptime % 3600 // 60}m)", "", "Latency p50 / p95 / p99 (count)"]
+
+    for (path, stage), summary in STAGE_SECONDS.summary().items():
+        lines.append(
+            f"{path}.{stage}: {format_duration(summary['p50'])} / {format_duration(summary['p95'])} / "
+            f"{format_duration(summary['p99'])} ({summary['count']})"
+        )
+
+    outcomes = defaultdict(int)
+    host_errors = defaultdict(int)
+    for (host, result), count in FETCHES.values().items():
+        outcomes[result] += count
+        if result not in ('ok', 'not_modified'):
+            host_errors[host] += count
+    if outcomes:
+        lines += ["", "Fetches: " + ", ".join(f"{result} {int(count)}" for result, count in sorted(outcomes.items()))]
+        worst = sorted(host_errors.items(), key=lambda item: -item[1])[:TOP_ERROR_HOSTS]
+        if worst:
+            lines.append("Most errors: " + ", ".join(f"{host} {int(count)}" for host, count in worst))
+
+    caches = defaultdict(dict)
+    for (cache, result), count in CACHE_REQUESTS.values().items():
+        caches[cache][result] = count
+    if caches:
+        lines.append("")
+        for cache, results in sorted(caches.items()):
+            total = sum(results.values())
+            # Revalidated and stale entries are served without a full fetch
+            served = total - results.get('miss', 0)
+            lines.append(f"{cache} cache: {served / total:.0%} hit of {int(total)}")
+
+    depth = registry.get('metamind_queue_depth')
+    if depth:
+        lines += ["", "Queues: " + ", ".join(f"{labels[0]} {value}" for labels, value in sorted(depth.values().items()))]
+
+    return "\n".join(lines)
+
+def handle_stats_command(bot, message):
+    """Handle /stats for admins by replying with a metrics summary."""
+    try:
+        if not is_admin(message):
+            bot.reply_to(message, "⛔ /stats is only available to the bot's admins.")
+            return
+        bot.send_message(message.chat.id, f"```\n{format_stats()}\n```", parse_mode="Markdown")
+
+    except Exception as e:
+        logger.error("Error in stats command: %s", e)
+        bot.reply_to(message, "⚠️ An error occurred while collecting stats.")
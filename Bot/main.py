@@ -1,208 +1,234 @@
 import logging
-import telebot
-import sys
 import os
-import time  # Added import
-import re  # Add this import at the top
-import logging.handlers  # Add after imports
-import threading  # Add this import
-from dotenv import load_dotenv
-from typing import Optional, Dict, Any
-from telebot.types import Message
-from telebot.handler_backends import State, StatesGroup
-from telebot.storage import StateMemoryStorage
-from telebot import asyncio_filters
-from collections import defaultdict
-from utils.log_cleanup import cleanup_logs  # Add to imports section at top
-from utils.messages import SUCCESS_MESSAGES, ERROR_MESSAGES
-from utils.metadata import extract_metadata, store_metadata
-
-# Add the project root to Python path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-# Ensure the project directory is in sys.path
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-from utils.metadata import extract_metadata
-from handlers.list_handler import handle_list_command, handle_number_selection
-from handlers.delete_handler import (
-    handle_delete_command, 
-    handle_delete_selection, 
-    delete_states,
-    cleanup_delete_states  # Add this import
-)
+import secrets
+import threading
+import time
+
+# Application modules are imported inside the functions below: config reads
+# the environment on first import, which must come after main() loads .env
 
-# Add this function after imports
-def extract_url(text: str) -> str:
-    """Extract URL from message text."""
-    # Pattern to match URLs
-    url_pattern = r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+'
-    urls = re.findall(url_pattern, text)
-    return urls[0] if urls else None
-
-def ensure_project_structure():
-    """Ensure required directories exist."""
-    dirs = [
-        'Bot/logs',
-        'Bot/data',
-        'Bot/utils',
-        'Bot/handlers'
-    ]
-    
-    for dir_path in dirs:
-        full_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), dir_path)
-        if not os.path.exists(full_path):
-            os.makedirs(full_path)
-            logger.info(f"Created directory: {dir_path}")
-
-# Load environment variables
-load_dotenv()
-TOKEN = os.getenv("BOT_TOKEN")
-
-if not TOKEN:
-    raise ValueError("BOT_TOKEN is missing! Check your .env file.")
-
-# Rate limiting
-RATE_LIMIT = 2  # seconds between messages
-last_message_time: Dict[int, float] = defaultdict(float)
-
-def rate_limit_check(message: Message) -> bool:
-    """Check if user is sending messages too quickly."""
-    user_id = message.from_user.id
-    current_time = time.time()
-    
-    if current_time - last_message_time[user_id] < RATE_LIMIT:
-        return False
-    
-    last_message_time[user_id] = current_time
-    return True
-
-# Ensure project structure before bot initialization
-ensure_project_structure()
-
-# Initialize bot with state storage
-state_storage = StateMemoryStorage()
-bot = telebot.TeleBot(TOKEN, state_storage=state_storage)
-
-# Enable logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        # Console handler
-        logging.StreamHandler(),
-        # File handler
-        logging.handlers.RotatingFileHandler(
-            'Bot/logs/bot.log',
-            maxBytes=1024 * 1024,  # 1MB
-            backupCount=5,
-            encoding='utf-8'
-        )
-    ]
-)
 logger = logging.getLogger(__name__)
 
-@bot.message_handler(func=lambda message: message.text and ('http://' in message.text.lower() or 'https://' in message.text.lower()))
-def handle_link(message: Message) -> None:
-    """Handle messages containing URLs."""
-    try:
-        url = extract_url(message.text)
-        if not url:
-            bot.reply_to(message, ERROR_MESSAGES['invalid_url'])
-            return
-
-        logger.info(f"Extracted URL: {url}")
-        metadata = extract_metadata(url)
-
-        if "error" in metadata:
-            bot.reply_to(message, ERROR_MESSAGES['metadata_error'])
-            return
-
-        # Store the metadata
-        store_metadata(url, metadata)
-        
-        # Format success message
-        response = SUCCESS_MESSAGES['link_added'].format(
-            title=metadata.get('title', 'No title')
-        )
-        bot.reply_to(message, response, parse_mode="Markdown")
+# Polling restarts back off from the first delay up to the cap; a run this long resets it
+POLLING_RETRY_DELAY = 1
+POLLING_RETRY_MAX_DELAY = 60
+POLLING_STABLE_SECONDS = 300
+
+HELP_TEXT = (
+    "*🤖 Welcome to MetaMind Bot!*\n\n"
+    "*Available Commands:*\n"
+    "📎 Send any URL to extract metadata\n"
+    "📋 /list - Browse your saved links\n"
+    "🏷️ /list <category> - Only links in a category\n"
+    "🔎 /search - Find links by title, description or URL\n"
+    "🗑️ /del - Delete links\n"
+    "📥 Send a .txt, .csv or bookmarks .html file to import links\n"
+    "❓ /help - Show this message\n\n"
+    "*Quick Tips:*\n"
+    "• Reply with numbers to select items\n"
+    "• Delete multiple links using:\n"
+    "  └ Comma format: `1,2,3`\n"
+    "  └ Space format: `1 2 3`\n\n"
+    "_Made with ❤️ by MetaMind_"
+)
 
-    except Exception as e:
-        logger.error(f"Error processing link: {e}")
-        bot.reply_to(message, ERROR_MESSAGES['general_error'])
-
-# Add this after your other handlers
-@bot.message_handler(commands=['list'])
-def list_command(message):
-    handle_list_command(bot, message)
-
-# Update the delete command handler to include 'del' alias
-@bot.message_handler(commands=['delete', 'del'])
-def delete_command(message):
-    handle_delete_command(bot, message)
-
-# Update the delete selection handler to better handle spaces
-@bot.message_handler(func=lambda message: message.text and 
-                    (message.text.isdigit() or ',' in message.text or 
-                     ' ' in message.text.strip() or message.text.lower() in ['all', 'yes']))
-def delete_selection(message):
-    logger.info(f"[MAIN] Received message: '{message.text}'")
-    if message.chat.id in delete_states:
-        handle_delete_selection(bot, message)
-    else:
-        logger.info("[MAIN] Not in delete state, passing to number selection")
-        handle_number_selection(message)
-
-@bot.message_handler(func=lambda message: message.text and message.text.isdigit())
-def number_selection(message):
-    handle_number_selection(message)
-
-@bot.message_handler(commands=['help', 'start'])
-def help_command(message: Message) -> None:
-    """Display bot usage information."""
-    help_text = (
-        "*🤖 Welcome to MetaMind Bot!*\n\n"
-        "*Available Commands:*\n"
-        "📎 Send any URL to extract metadata\n"
-        "📋 /list - Browse your saved links\n"
-        "🗑️ /del - Delete links\n"
-        "❓ /help - Show this message\n\n"
-        "*Quick Tips:*\n"
-        "• Reply with numbers to select items\n"
-        "• Delete multiple links using:\n"
-        "  └ Comma format: `1,2,3`\n"
-        "  └ Space format: `1 2 3`\n\n"
-        "_Made with ❤️ by MetaMind_"
+def create_bot(token: str):
+    """Build the bot; handlers run in parallel across chats, in order within one."""
+    from telebot import apihelper
+    from config import TELEGRAM_API_URL
+    from utils.dispatcher import DispatchingTeleBot
+    from utils.rate_limiter import get_rate_limiter
+
+    # Talk to a local Bot API server instead of api.telegram.org when configured
+    if TELEGRAM_API_URL:
+        apihelper.API_URL = TELEGRAM_API_URL.rstrip('/') + "/bot{0}/{1}"
+        apihelper.FILE_URL = TELEGRAM_API_URL.rstrip('/') + "/file/bot{0}/{1}"
+
+    return DispatchingTeleBot(token, limiter=get_rate_limiter())
+
+def register_handlers(bot) -> None:
+    """Attach every command, message and callback handler to ``bot``."""
+    from handlers.delete_handler import (
+        handle_delete_command,
+        handle_delete_page,
+        handle_delete_selection,
+        get_delete_state
     )
-    bot.send_message(message.chat.id, help_text, parse_mode="Markdown")
+    from handlers.import_handler import handle_import_document
+    from handlers.list_handler import (
+        handle_list_command,
+        handle_list_page,
+        handle_number_selection
+    )
+    from handlers.save import handle_link
+    from handlers.search_handler import handle_search_command, handle_search_page
+    from handlers.stats_handler import handle_stats_command
+
+    @bot.message_handler(func=lambda message: message.text and ('http://' in message.text.lower() or 'https://' in message.text.lower()))
+    def link_message(message):
+        handle_link(bot, message)
+
+    @bot.message_handler(commands=['list'])
+    def list_command(message):
+        handle_list_command(bot, message)
+
+    @bot.callback_query_handler(func=lambda call: call.data.startswith('list:'))
+    def list_page(call):
+        handle_list_page(bot, call)
+
+    @bot.message_handler(commands=['search'])
+    def search_command(message):
+        handle_search_command(bot, message)
+
+    @bot.callback_query_handler(func=lambda call: call.data.startswith('search:'))
+    def search_page(call):
+        handle_search_page(bot, call)
+
+    @bot.message_handler(content_types=['document'])
+    def import_document(message):
+        handle_import_document(bot, message)
+
+    # 'del' is an alias of /delete
+    @bot.message_handler(commands=['delete', 'del'])
+    def delete_command(message):
+        handle_delete_command(bot, message)
+
+    @bot.callback_query_handler(func=lambda call: call.data.startswith('del:'))
+    def delete_page(call):
+        handle_delete_page(bot, call)
+
+    # Selections may be separated by commas or spaces
+    @bot.message_handler(func=lambda message: message.text and
+                        (message.text.isdigit() or ',' in message.text or
+                         ' ' in message.text.strip() or message.text.lower() in ['all', 'yes']))
+    def delete_selection(message):
+        logger.info("[MAIN] Received message: '%s'", message.text)
+        if get_delete_state(message.chat.id) is not None:
+            handle_delete_selection(bot, message)
+        else:
+            logger.info("[MAIN] Not in delete state, passing to number selection")
+            handle_number_selection(bot, message)
+
+    @bot.message_handler(func=lambda message: message.text and message.text.isdigit())
+    def number_selection(message):
+        handle_number_selection(bot, message)
+
+    @bot.message_handler(commands=['stats'])
+    def stats_command(message):
+        handle_stats_command(bot, message)
+
+    @bot.message_handler(commands=['help', 'start'])
+    def help_command(message) -> None:
+        """Display bot usage information."""
+        bot.send_message(message.chat.id, HELP_TEXT, parse_mode="Markdown")
+
+def categorize_existing_links():
+    """Categorize links saved before the categorizer existed, in one batched pass."""
+    from utils.categorizer import categorize_store
+    from utils.storage import get_store
 
-def cleanup_thread():
-    """Thread to clean up logs and states every 5 minutes."""
-    while True:
-        try:
-            # Clean up delete states
-            cleanup_delete_states()
-            
-            # Clean up log file
-            log_file = 'Bot/logs/bot.log'
-            cleanup_logs(log_file)
-            
-            # Wait for 5 minutes
-            time.sleep(300)
-        except Exception as e:
-            logger.error(f"Error in cleanup thread: {e}")
-            time.sleep(300)
+    try:
+        categorize_store(get_store())
+    except Exception as e:
+        logger.error("Error categorizing stored links: %s", e)
+
+def register_queue_gauges(bot):
+    """Expose queue depths, read only when metrics are collected."""
+    from config import AI_ENHANCEMENT_ENABLED
+    from handlers.import_handler import active_imports
+    from utils.fetcher import get_pipeline
+    from utils.metrics import registry
+
+    def depths():
+        return {
+            ('fetch',): get_pipeline().queue_depth(),
+            ('dispatch',): bot.dispatcher.pending(),
+            ('imports',): len(active_imports),
+        }
+
+    registry.gauge('metamind_queue_depth', 'Items waiting in each queue', depths, ('queue',))
+    if AI_ENHANCEMENT_ENABLED:
+        from utils.ai_helper import get_enhancement_queue
+        registry.gauge('metamind_ai_queue_depth', 'Links waiting for AI enhancement',
+                       lambda: get_enhancement_queue().jobs.qsize())
+
+def start_background_tasks(bot) -> None:
+    """Start the categorizer and export threads and the metrics server."""
+    from config import METRICS_PORT
+
+    threading.Thread(target=categorize_existing_links, name='categorizer', daemon=True).start()
+
+    # Back up saved links to Google Sheets/Drive when EXPORT_TARGET is set
+    from utils.google_drive import build_exporter
+    exporter = build_exporter()
+    if exporter:
+        threading.Thread(target=exporter.run_forever, name='exporter', daemon=True).start()
+
+    register_queue_gauges(bot)
+    if METRICS_PORT:
+        from utils.metrics import MetricsServer
+        host, port = MetricsServer().start().address
+        logger.info("Metrics available at http://%s:%s/metrics", host, port)
+
+def run_webhook(bot):
+    """Receive updates through the built-in webhook server."""
+    from config import WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_URL
+    from utils.webhook import WebhookServer
+
+    secret = WEBHOOK_SECRET
+    if WEBHOOK_URL:
+        # Telegram sends the secret with every update; without one the endpoint would accept forged updates
+        if not secret:
+            secret = secrets.token_urlsafe(32)
+            logger.info("WEBHOOK_SECRET is not set; registered a random secret for this run")
+        bot.remove_webhook()
+        bot.set_webhook(url=WEBHOOK_URL.rstrip('/') + WEBHOOK_PATH, secret_token=secret)
+    else:
+        logger.warning("WEBHOOK_URL is not set; expecting updates from a local sender")
 
-# Start cleanup thread
-cleanup_thread = threading.Thread(target=cleanup_thread, daemon=True)
-cleanup_thread.start()
+    WebhookServer(bot, secret=secret).serve_forever()
 
-# Start polling
-if __name__ == "__main__":
-    logger.info("MetaMind Bot is running...")
+def run_polling(bot):
+    """Long-poll for updates, restarting with exponential backoff after errors."""
+    bot.remove_webhook()
+    delay = POLLING_RETRY_DELAY
     while True:
+        started = time.monotonic()
         try:
             bot.polling(none_stop=True, timeout=60)
         except Exception as e:
-            logger.error(f"Bot polling error: {e}")
-            time.sleep(15)  # Wait before retrying
+            logger.error("Bot polling error: %s", e)
+        if time.monotonic() - started >= POLLING_STABLE_SECONDS:
+            delay = POLLING_RETRY_DELAY
+        logger.info("Restarting polling in %ss", delay)
+        time.sleep(delay)
+        delay = min(delay * 2, POLLING_RETRY_MAX_DELAY)
+
+def main():
+    """Load .env, configure logging, build the bot and serve updates until stopped."""
+    # Variables already set in the environment win over the file
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    from config import BOT_MODE
+    from utils.logging_config import setup_logging
+
+    token = os.getenv("BOT_TOKEN")
+    if not token:
+        raise ValueError("BOT_TOKEN is missing! Check your .env file.")
+
+    # Records are written by a background listener so handlers never wait on disk
+    setup_logging()
+
+    bot = create_bot(token)
+    register_handlers(bot)
+    start_background_tasks(bot)
+
+    logger.info("MetaMind Bot is running in %s mode...", BOT_MODE)
+    if BOT_MODE == 'webhook':
+        run_webhook(bot)
+    else:
+        run_polling(bot)
+
+if __name__ == "__main__":
+    main()
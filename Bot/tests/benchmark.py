@@ -0,0 +1,497 @@
+"""Offline benchmark for saving links, /list and /del.
+
+Runs Bot/main.py in webhook mode against a fake Bot API and a local
+fixture site, so no network access or Telegram account is needed. For
+every store size it seeds a fresh database and starts the bot. Then it
+measures:
+- saved links per second and save latency (update sent until the
+  "saving" reply is edited), over a mix of normal, slow, huge, binary
+  and redirecting pages
+- /list and /del latency
+- the bot's peak memory
+
+It also measures startup: importing main.py, a cold start until the bot
+answers /help, and a restart after the process is killed, as after a
+crash.
+
+Results are printed and written as JSON. --compare prints the change
+against an earlier result file.
+
+Example:
+    python Bot/tests/benchmark.py --sizes 1000 10000 100000 --output bench.json
+    python Bot/tests/benchmark.py --sizes 1000 --compare bench.json
+    python Bot/tests/benchmark.py --sizes --startup-runs 10
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BOT_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, TESTS_DIR)
+
+from fake_telegram import FakeTelegramAPI, make_message_update, send_update  # noqa: E402
+
+WEBHOOK_SECRET = 'benchmark'
+
+# Chat holding the seeded links; each saved link comes from its own chat so replies are easy to match
+STORE_CHAT_ID = 1
+SAVE_CHAT_BASE = 100000
+
+# Share of each fixture page kind among saved links
+PAGE_MIX = ['page'] * 6 + ['slow', 'huge', 'binary', 'redirect']
+SLOW_DELAY = 0.5
+HUGE_BODY_BYTES = 5 * 1024 * 1024
+BINARY_BYTES = 1024 * 1024
+
+# Settings for the bot under test: policy limits that would otherwise measure
+# the throttles instead of the bot (all fixture pages share one host)
+BOT_ENV = {
+    'HTTP_PER_HOST_RPS': '0',
+    'HTTP_PER_HOST_CONCURRENCY': '64',
+    'RATE_LIMIT_USER_BURST': '1000',
+    'RATE_LIMIT_GLOBAL_RATE': '10000',
+    'RATE_LIMIT_GLOBAL_BURST': '10000',
+    'RATE_LIMIT_FETCH_RATE': '1000',
+    'RATE_LIMIT_FETCH_BURST': '1000',
+    'AI_ENHANCEMENT_ENABLED': 'false',
+    'EXPORT_TARGET': '',
+    'METRICS_PORT': '0',
+    'LOG_LEVEL': 'WARNING',
+}
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # The bot hangs up on huge pages once it has the head; that is expected
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+class FixtureSite:
+    """Local website serving the kinds of pages users save, including awkward ones."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self._server = QuietHTTPServer((host, port), self._handler_class())
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FixtureSite':
+        threading.Thread(target=self._server.serve_forever, name='fixture-site', daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    @staticmethod
+    def _handler_class():
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, content_type: str, body: bytes, length: Optional[int] = None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body) if length is None else length))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _page(self, name: str) -> bytes:
+                return (
+                    f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Fixture {name}</title>"
+                    f"<meta name=\"description\" content=\"Benchmark fixture page {name} about python tutorials\">"
+                    f"</head><body>{'<p>filler text</p>' * 200}</body></html>"
+                ).encode()
+
+            def do_GET(self):
+                parts = self.path.strip('/').split('/')
+                kind, name = parts[0], parts[-1]
+                try:
+                    if kind == 'page':
+                        self._send(200, 'text/html; charset=utf-8', self._page(name))
+                    elif kind == 'slow':
+                        time.sleep(SLOW_DELAY)
+                        self._send(200, 'text/html; charset=utf-8', self._page(name))
+                    elif kind == 'huge':
+                        head = self._page(name).split(b'<body>')[0] + b'<body>'
+                        self._send(200, 'text/html; charset=utf-8', head, len(head) + HUGE_BODY_BYTES)
+                        chunk = b'x' * 65536
+                        for _ in range(HUGE_BODY_BYTES // len(chunk)):
+                            self.wfile.write(chunk)
+                    elif kind == 'binary':
+                        self._send(200, 'application/octet-stream', os.urandom(BINARY_BYTES))
+                    elif kind == 'redirect':
+                        self.send_response(302)
+                        self.send_header('Location', f"/page/{name}")
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                    else:
+                        self._send(404, 'text/plain', b'not found')
+                except (BrokenPipeError, ConnectionResetError):
+                    # The bot stops reading after </head>
+                    self.close_connection = True
+
+        return Handler
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, Any]:
+    to_ms = lambda value: None if value is None else round(value * 1000, 2)
+    return {
+        'count': len(samples),
+        'p50_ms': to_ms(percentile(samples, 0.50)),
+        'p95_ms': to_ms(percentile(samples, 0.95)),
+        'max_ms': to_ms(max(samples) if samples else None),
+    }
+
+
+def seed_store(path: str, size: int) -> float:
+    """Fill a fresh store with ``size`` links in the store chat and return the seconds taken."""
+    from utils.storage import LinkStore
+
+    started = time.perf_counter()
+    store = LinkStore(path)
+    batch = 5000
+    for offset in range(0, size, batch):
+        store.add_many(STORE_CHAT_ID, (
+            (f"https://seed.example/{index}",
+             {'title': f"Seeded link {index}", 'description': f"Stored link number {index} for the benchmark"},
+             'Other')
+            for index in range(offset, min(size, offset + batch))
+        ))
+    store.close()
+    return time.perf_counter() - started
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def peak_memory_mb(pid: int) -> Optional[float]:
+    """Return a process's peak resident memory (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+class BotProcess:
+    """Runs Bot/main.py in webhook mode against the fake API with its own data directory."""
+
+    def __init__(self, api: FakeTelegramAPI, directory: str, storage_path: str):
+        self.port = free_port()
+        self.webhook_url = f"http://127.0.0.1:{self.port}/telegram"
+        env = dict(os.environ, **BOT_ENV)
+        env.update({
+            'BOT_TOKEN': '123456:benchmark',
+            'BOT_MODE': 'webhook',
+            'TELEGRAM_API_URL': api.url,
+            'WEBHOOK_URL': '',
+            'WEBHOOK_HOST': '127.0.0.1',
+            'WEBHOOK_PORT': str(self.port),
+            'WEBHOOK_SECRET': WEBHOOK_SECRET,
+            'STORAGE_PATH': storage_path,
+            'DATABASE_PATH': os.path.join(directory, 'database.json'),
+            'LOG_FILE': os.path.join(directory, 'logs', 'bot.log'),
+        })
+        self.output_path = os.path.join(directory, 'bot.out')
+        self.launched = time.monotonic()
+        with open(self.output_path, 'ab') as output:
+            self.process = subprocess.Popen(
+                [sys.executable, os.path.join(BOT_DIR, 'main.py')],
+                cwd=directory, env=env, stdout=output, stderr=subprocess.STDOUT
+            )
+
+    def wait_ready(self, timeout: float = 30) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                with open(self.output_path, errors='replace') as output:
+                    raise RuntimeError(f"Bot exited during startup: {output.read()[-2000:]}")
+            try:
+                with socket.create_connection(('127.0.0.1', self.port), timeout=0.2):
+                    return
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError("Bot did not start listening in time")
+
+    def send(self, chat_id: int, text: str) -> None:
+        status = send_update(self.webhook_url, make_message_update(chat_id, text), WEBHOOK_SECRET)
+        if status != 200:
+            raise RuntimeError(f"Webhook answered HTTP {status}")
+
+    def kill(self) -> None:
+        """Stop the process the way a crash would, without a clean shutdown."""
+        self.process.kill()
+        self.process.wait()
+
+    def stop(self) -> Optional[float]:
+        peak = peak_memory_mb(self.process.pid)
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        return peak
+
+
+def roundtrip(api: FakeTelegramAPI, bot: BotProcess, chat_id: int, text: str, timeout: float = 30) -> float:
+    """Send a message and return the seconds until the bot's next reply in that chat."""
+    seen = len(api.calls_to('sendMessage', chat_id))
+    started = time.monotonic()
+    bot.send(chat_id, text)
+    calls = api.wait_for('sendMessage', seen + 1, timeout, chat_id=chat_id)
+    if len(calls) <= seen:
+        raise RuntimeError(f"No reply to {text!r} within {timeout}s")
+    return calls[seen]['time'] - started
+
+
+def bench_saves(api: FakeTelegramAPI, bot: BotProcess, site: FixtureSite, links: int, run: int,
+                senders: int) -> Dict[str, Any]:
+    """Send ``links`` links at once and time each until its "saving" reply is edited."""
+    chats = [SAVE_CHAT_BASE + run * links + index for index in range(links)]
+    sent_at: Dict[int, float] = {}
+
+    def send(index: int) -> None:
+        chat_id = chats[index]
+        url = f"{site.url}/{PAGE_MIX[index % len(PAGE_MIX)]}/{run}-{index}"
+        sent_at[chat_id] = time.monotonic()
+        bot.send(chat_id, url)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(senders) as pool:
+        list(pool.map(send, range(links)))
+
+    deadline = time.monotonic() + 60 + links * 0.1
+    done: Dict[int, Dict[str, Any]] = {}
+    while len(done) < links and time.monotonic() < deadline:
+        for call in api.calls_to('editMessageText'):
+            chat_id = int(call['params'].get('chat_id', 0))
+            if chat_id in sent_at and chat_id not in done:
+                done[chat_id] = call
+        time.sleep(0.05)
+
+    latencies = [call['time'] - sent_at[chat_id] for chat_id, call in done.items()]
+    errors = sum(1 for call in done.values() if not call['params'].get('text', '').startswith('✅'))
+    finished = max((call['time'] for call in done.values()), default=time.monotonic())
+    result = latency_summary(latencies)
+    result.update({
+        'links_per_second': round(len(done) / max(finished - started, 1e-9), 2),
+        'unfinished': links - len(done),
+        'not_saved': errors,
+    })
+    return result
+
+
+def bench_size(api: FakeTelegramAPI, site: FixtureSite, size: int, args, run: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix='metamind-bench-') as directory:
+        storage_path = os.path.join(directory, 'metamind.db')
+        seed_seconds = seed_store(storage_path, size)
+
+        bot = BotProcess(api, directory, storage_path)
+        try:
+            bot.wait_ready()
+            # Warm up the process (imports, first store access) outside the measurements
+            roundtrip(api, bot, STORE_CHAT_ID, '/help')
+
+            saves = bench_saves(api, bot, site, args.links, run, args.senders)
+            lists = [roundtrip(api, bot, STORE_CHAT_ID, '/list') for _ in range(args.repeat)]
+            opens, deletes = [], []
+            for _ in range(args.repeat):
+                opens.append(roundtrip(api, bot, STORE_CHAT_ID, '/del'))
+                deletes.append(roundtrip(api, bot, STORE_CHAT_ID, '1'))
+        finally:
+            peak = bot.stop()
+
+    return {
+        'stored_links': size,
+        'seed_seconds': round(seed_seconds, 2),
+        'save': saves,
+        'list': latency_summary(lists),
+        'del_open': latency_summary(opens),
+        'del_one': latency_summary(deletes),
+        'peak_rss_mb': peak,
+    }
+
+
+def time_to_first_reply(api: FakeTelegramAPI, bot: BotProcess, timeout: float = 30) -> float:
+    """Return the seconds from launching ``bot`` until it answers /help."""
+    bot.wait_ready(timeout)
+    seen = len(api.calls_to('sendMessage', STORE_CHAT_ID))
+    bot.send(STORE_CHAT_ID, '/help')
+    calls = api.wait_for('sendMessage', seen + 1, timeout, chat_id=STORE_CHAT_ID)
+    if len(calls) <= seen:
+        raise RuntimeError(f"No reply to /help within {timeout}s")
+    return calls[seen]['time'] - bot.launched
+
+
+def import_seconds(directory: str) -> float:
+    """Time a fresh interpreter importing main.py, which must not start the bot."""
+    env = dict(os.environ, BOT_TOKEN='123456:benchmark', LOG_FILE=os.path.join(directory, 'import.log'))
+    started = time.monotonic()
+    subprocess.run([sys.executable, '-c', 'import main'], cwd=BOT_DIR, env=env, check=True, timeout=60)
+    return time.monotonic() - started
+
+
+def bench_startup(api: FakeTelegramAPI, runs: int, size: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix='metamind-bench-') as directory:
+        storage_path = os.path.join(directory, 'metamind.db')
+        seed_store(storage_path, size)
+
+        imports, cold, restart = [], [], []
+        for _ in range(runs):
+            imports.append(import_seconds(directory))
+            bot = BotProcess(api, directory, storage_path)
+            try:
+                cold.append(time_to_first_reply(api, bot))
+            finally:
+                bot.kill()
+            # Same data directory, so the store reopens after an unclean exit
+            bot = BotProcess(api, directory, storage_path)
+            try:
+                restart.append(time_to_first_reply(api, bot))
+            finally:
+                bot.stop()
+
+    return {
+        'stored_links': size,
+        'import': latency_summary(imports),
+        'cold_start': latency_summary(cold),
+        'restart': latency_summary(restart),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Metrics compared by --compare, and whether a higher value is better
+COMPARED = [
+    (('save', 'links_per_second'), True),
+    (('save', 'p95_ms'), False),
+    (('list', 'p95_ms'), False),
+    (('del_open', 'p95_ms'), False),
+    (('del_one', 'p95_ms'), False),
+    (('peak_rss_mb',), False),
+]
+
+STARTUP_COMPARED = [('import', 'p50_ms'), ('cold_start', 'p50_ms'), ('restart', 'p50_ms')]
+
+
+def lookup(result: Dict[str, Any], path) -> Optional[float]:
+    for key in path:
+        result = result.get(key) if isinstance(result, dict) else None
+    return result
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> None:
+    print(f"\nChange from {baseline.get('commit') or 'baseline'} to {current.get('commit') or 'current'}:")
+    for size, result in current['results'].items():
+        before = baseline.get('results', {}).get(size)
+        if not before:
+            continue
+        for path, higher_is_better in COMPARED:
+            old, new = lookup(before, path), lookup(result, path)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            worse = change < 0 if higher_is_better else change > 0
+            marker = '  <-- worse' if worse and abs(change) >= 10 else ''
+            print(f"  {size:>7} {'.'.join(path):<26} {old:>10} -> {new:<10} ({change:+.1f}%){marker}")
+    for path in STARTUP_COMPARED:
+        old, new = lookup(baseline.get('startup', {}), path), lookup(current.get('startup', {}), path)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        marker = '  <-- worse' if change >= 10 else ''
+        print(f"  {'startup':>7} {'.'.join(path):<26} {old:>10} -> {new:<10} ({change:+.1f}%){marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bot against local fixtures.")
+    parser.add_argument('--sizes', type=int, nargs='*', default=[1000, 10000, 100000],
+                        help="stored links to seed before each run")
+    parser.add_argument('--links', type=int, default=200, help="links saved per run")
+    parser.add_argument('--senders', type=int, default=8, help="threads posting updates")
+    parser.add_argument('--repeat', type=int, default=20, help="/list and /del round trips per run")
+    parser.add_argument('--startup-runs', type=int, default=5,
+                        help="cold starts and restarts to time (0 skips them)")
+    parser.add_argument('--startup-size', type=int, default=10000, help="stored links during startup runs")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--compare', help="earlier JSON result to compare against")
+    args = parser.parse_args()
+
+    api = FakeTelegramAPI().start()
+    site = FixtureSite().start()
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'links': args.links, 'senders': args.senders, 'repeat': args.repeat, 'bot_env': BOT_ENV},
+        'results': {},
+    }
+    try:
+        if args.startup_runs:
+            print(f"Timing startup with {args.startup_size} stored links...", flush=True)
+            report['startup'] = bench_startup(api, args.startup_runs, args.startup_size)
+            print(json.dumps(report['startup'], indent=2), flush=True)
+        for run, size in enumerate(args.sizes):
+            print(f"Benchmarking with {size} stored links...", flush=True)
+            result = bench_size(api, site, size, args, run)
+            report['results'][str(size)] = result
+            print(json.dumps(result, indent=2), flush=True)
+    finally:
+        api.stop()
+        site.stop()
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(json.load(baseline), report)
+
+
+if __name__ == "__main__":
+    main()
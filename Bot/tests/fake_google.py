@@ -0,0 +1,182 @@
+"""Local stand-in for the Google Sheets and Drive APIs used by the exporter.
+
+FakeGoogleAPI keeps a single sheet and accepts Sheets ``values:append``,
+``values:batchUpdate`` and column reads, plus Drive multipart uploads. It
+can fail on purpose, so throttling, retries and checkpoint resume can be
+checked without a Google account.
+
+Example:
+    python Bot/tests/fake_google.py --links 5000 --fail-after 3
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+from urllib.parse import unquote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+APPEND_PATH = re.compile(r"^/v4/spreadsheets/([^/]+)/values/([^?]+):append")
+BATCH_UPDATE_PATH = re.compile(r"^/v4/spreadsheets/([^/]+)/values:batchUpdate")
+# Reads of a single column, e.g. Links!C:C
+COLUMN_PATH = re.compile(r"^/v4/spreadsheets/([^/]+)/values/([^?!]+)!([A-Z]):[A-Z]")
+ROW_RANGE = re.compile(r"!A(\d+):")
+
+
+class FakeGoogleAPI:
+    """Records sheet rows and uploaded files; fails when told to."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.rows: List[List[Any]] = []
+        self.files: Dict[str, str] = {}
+        self.requests = 0
+        self.fail_after = None  # answer 503 once this many requests succeeded
+        self.throttle_every = 0  # answer 429 to every n-th request
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakeGoogleAPI':
+        threading.Thread(target=self._server.serve_forever, name='fake-google', daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, payload: Dict[str, Any]):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _refuse(self) -> bool:
+                """Answer with an injected failure or a missing-token error, if due."""
+                api.requests += 1
+                if api.throttle_every and api.requests % api.throttle_every == 0:
+                    self._reply(429, {'error': {'message': 'Quota exceeded'}})
+                    return True
+                if api.fail_after is not None:
+                    if api.fail_after <= 0:
+                        self._reply(503, {'error': {'message': 'Backend unavailable'}})
+                        return True
+                    api.fail_after -= 1
+                if not self.headers.get('Authorization', '').startswith('Bearer '):
+                    self._reply(401, {'error': {'message': 'Missing token'}})
+                    return True
+                return False
+
+            def do_GET(self):
+                with api._lock:
+                    if self._refuse():
+                        return
+                    match = COLUMN_PATH.match(unquote(self.path))
+                    if match:
+                        index = ord(match.group(3)) - ord('A')
+                        column = [row[index] if index < len(row) else '' for row in api.rows]
+                        return self._reply(200, {'values': [column] if column else []})
+                return self._reply(404, {'error': {'message': 'Not found'}})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                with api._lock:
+                    if self._refuse():
+                        return
+
+                    match = APPEND_PATH.match(self.path)
+                    if match:
+                        values = json.loads(body)['values']
+                        first = len(api.rows) + 1
+                        api.rows.extend(values)
+                        sheet = unquote(match.group(2)).split('!', 1)[0]
+                        return self._reply(200, {'updates': {
+                            'updatedRange': f"{sheet}!A{first}:I{len(api.rows)}",
+                            'updatedRows': len(values),
+                        }})
+
+                    if BATCH_UPDATE_PATH.match(self.path):
+                        data = json.loads(body)['data']
+                        for entry in data:
+                            api.rows[int(ROW_RANGE.search(entry['range']).group(1)) - 1] = entry['values'][0]
+                        return self._reply(200, {'totalUpdatedRows': len(data)})
+
+                    if self.path.startswith('/upload/drive/v3/files'):
+                        boundary = self.headers['Content-Type'].split('boundary=', 1)[1]
+                        parts = body.decode().split(f"--{boundary}")
+                        metadata = json.loads(parts[1].split('\r\n\r\n', 1)[1])
+                        api.files[metadata['name']] = parts[2].split('\r\n\r\n', 1)[1].rstrip('\r\n')
+                        return self._reply(200, {'id': metadata['name']})
+
+                return self._reply(404, {'error': {'message': 'Not found'}})
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a generated store to the fake Google API.")
+    parser.add_argument('--links', type=int, default=5000)
+    parser.add_argument('--target', choices=['sheets', 'drive'], default='sheets')
+    parser.add_argument('--fail-after', type=int, default=3, help="requests before the API goes down")
+    args = parser.parse_args()
+
+    api = FakeGoogleAPI().start()
+    from utils.google_drive import ApiClient, DriveSink, Exporter, ExportError, GoogleAuth, SheetsSink
+    from utils.storage import LinkStore
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = LinkStore(os.path.join(directory, 'links.db'))
+        for index in range(args.links):
+            store.add(index % 7, f"https://example.com/{index}", {'title': f"Link {index}", 'description': ''})
+
+        client = ApiClient(GoogleAuth(token='fake'), rps=50, max_retries=1)
+        sink = (SheetsSink(client, 'sheet', 'Links', api.url) if args.target == 'sheets'
+                else DriveSink(client, 'folder', api.url))
+        exporter = Exporter(store, sink, batch_size=500)
+
+        api.fail_after = args.fail_after
+        try:
+            exporter.run_once()
+        except ExportError as e:
+            print(f"Interrupted: {e}")
+        print(f"Checkpoint after interruption: {store.export_checkpoint(exporter.checkpoint_name)}")
+
+        api.fail_after = None
+        started = time.perf_counter()
+        print(f"Resumed and sent {exporter.run_once()} changes in {time.perf_counter() - started:.2f}s")
+
+        store.add(0, "https://example.com/new", {'title': 'New link', 'description': ''})
+        store.add(2, "https://example.com/2", {'title': 'Link 2, renamed', 'description': ''})
+        store.delete_many(1, store.ids(1)[:2])
+        print(f"Incremental run sent {exporter.run_once()} changes")
+
+        if args.target == 'sheets':
+            ids = [row[2] for row in api.rows]
+            print(f"Sheet holds {len(api.rows)} rows for {len(set(ids))} ids from {api.requests} requests")
+        else:
+            exported = sum(len(content.splitlines()) for content in api.files.values())
+            print(f"Fake API holds {exported} rows from {api.requests} requests")
+        store.close()
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Local stand-ins for Telegram, for running the bot without network access.
+
+FakeTelegramAPI answers the Bot API calls the bot makes and records them.
+send_update posts updates to the bot's webhook the way Telegram does.
+
+Example:
+    TELEGRAM_API_URL=http://127.0.0.1:8081 BOT_MODE=webhook python Bot/main.py
+    python Bot/tests/fake_telegram.py --webhook http://127.0.0.1:8443/telegram https://example.com /list
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlparse
+
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'MetaMind', 'username': 'metamind_bot'}
+
+# Methods whose result is the message that was sent or edited
+MESSAGE_METHODS = {'sendMessage', 'editMessageText', 'sendDocument'}
+
+
+class FakeTelegramAPI:
+    """Minimal Bot API server that records every call the bot makes."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, updates: Optional[List[dict]] = None):
+        self.calls: List[Dict[str, Any]] = []
+        self.pending_updates: List[dict] = list(updates or [])
+        self.files: Dict[str, bytes] = {}
+        self._message_ids = itertools.count(1000)
+        self._lock = threading.Condition()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakeTelegramAPI':
+        threading.Thread(target=self._server.serve_forever, name='fake-telegram', daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _matching(self, method: str, chat_id: Optional[int]) -> List[Dict[str, Any]]:
+        return [
+            call for call in self.calls
+            if call['method'] == method and (chat_id is None or str(call['params'].get('chat_id')) == str(chat_id))
+        ]
+
+    def calls_to(self, method: str, chat_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._matching(method, chat_id)
+
+    def wait_for(self, method: str, count: int = 1, timeout: float = 10,
+                 chat_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Block until ``count`` calls to ``method`` (in ``chat_id``, if given) were recorded or the timeout passes."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                calls = self._matching(method, chat_id)
+                remaining = deadline - time.monotonic()
+                if len(calls) >= count or remaining <= 0:
+                    return calls
+                self._lock.wait(remaining)
+
+    def _result(self, method: str, params: Dict[str, Any]):
+        if method == 'getMe':
+            return BOT_USER
+        if method == 'getUpdates':
+            with self._lock:
+                updates, self.pending_updates = self.pending_updates, []
+            return updates
+        if method == 'getFile':
+            return {'file_id': params.get('file_id'), 'file_unique_id': params.get('file_id'),
+                    'file_path': params.get('file_id')}
+        if method in MESSAGE_METHODS:
+            message_id = int(params.get('message_id') or next(self._message_ids))
+            return {
+                'message_id': message_id,
+                'date': int(time.time()),
+                'chat': {'id': int(params.get('chat_id', 0)), 'type': 'private'},
+                'from': BOT_USER,
+                'text': params.get('text', ''),
+            }
+        return True
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                path = urlparse(self.path)
+                params = dict(parse_qsl(path.query))
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+
+                if path.path.startswith('/file/'):
+                    data = api.files.get(path.path.rsplit('/', 1)[-1], b'')
+                    self.send_response(200)
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+
+                if body and self.headers.get('Content-Type', '').startswith('application/json'):
+                    params.update(json.loads(body))
+                elif body and self.headers.get('Content-Type', '').startswith('application/x-www-form-urlencoded'):
+                    params.update(parse_qsl(body.decode()))
+
+                method = path.path.rsplit('/', 1)[-1]
+                with api._lock:
+                    api.calls.append({'method': method, 'params': params, 'time': time.monotonic()})
+                    api._lock.notify_all()
+
+                payload = json.dumps({'ok': True, 'result': api._result(method, params)}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                try:
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the bot was stopped mid-request
+
+            do_GET = _serve
+            do_POST = _serve
+
+        return Handler
+
+
+_update_ids = itertools.count(1)
+
+
+def make_message_update(chat_id: int, text: str, user_id: Optional[int] = None,
+                        message_id: Optional[int] = None) -> dict:
+    """Build a Telegram update carrying a text message from a private chat."""
+    update_id = next(_update_ids)
+    user = {'id': user_id or chat_id, 'is_bot': False, 'first_name': f'User{user_id or chat_id}'}
+    message = {
+        'message_id': message_id or update_id,
+        'date': int(time.time()),
+        'chat': {'id': chat_id, 'type': 'private'},
+        'from': user,
+        'text': text,
+    }
+    if text.startswith('/'):
+        command = text.split()[0]
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(command)}]
+    return {'update_id': update_id, 'message': message}
+
+
+def make_callback_update(chat_id: int, message_id: int, data: str) -> dict:
+    """Build a Telegram update for an inline button press."""
+    update_id = next(_update_ids)
+    user = {'id': chat_id, 'is_bot': False, 'first_name': f'User{chat_id}'}
+    return {
+        'update_id': update_id,
+        'callback_query': {
+            'id': str(update_id),
+            'from': user,
+            'chat_instance': str(chat_id),
+            'data': data,
+            'message': {
+                'message_id': message_id,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': BOT_USER,
+                'text': '',
+            },
+        },
+    }
+
+
+def send_update(webhook_url: str, update: dict, secret: str = '') -> int:
+    """POST one update to a webhook and return the HTTP status."""
+    request = urllib.request.Request(
+        webhook_url,
+        data=json.dumps(update).encode(),
+        headers={'Content-Type': 'application/json', 'X-Telegram-Bot-Api-Secret-Token': secret}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send fake Telegram updates to a local bot.")
+    parser.add_argument('texts', nargs='+', help="message texts to send, in order")
+    parser.add_argument('--webhook', default='http://127.0.0.1:8443/telegram')
+    parser.add_argument('--secret', default='')
+    parser.add_argument('--chat', type=int, default=1001)
+    parser.add_argument('--api-port', type=int, default=8081)
+    parser.add_argument('--wait', type=float, default=5, help="seconds to wait for replies")
+    args = parser.parse_args()
+
+    api = FakeTelegramAPI(port=args.api_port).start()
+    print(f"Fake Bot API listening on {api.url}")
+
+    for text in args.texts:
+        status = send_update(args.webhook, make_message_update(args.chat, text), args.secret)
+        print(f"-> {text!r}: HTTP {status}")
+
+    time.sleep(args.wait)
+    for call in api.calls:
+        print(f"<- {call['method']}: {call['params'].get('text', '')}")
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,11 @@ import sys
 import json
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.metadata import extract_metadata
+from utils.metadata import extract_metadata, store_metadata
+from utils.storage import get_store
+
+# Chat that owns the links saved by this script
+TEST_CHAT_ID = -1
 
 def test_url():
     test_urls = [
@@ -11,9 +15,8 @@ def test_url():
         "https://www.python.org/",
     ]
     
-    # Read stored metadata
-    db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database.json')
-    
+    store = get_store()
+
     for url in test_urls:
         print("\n" + "="*50)
         print(f"Testing URL: {url}")
@@ -25,19 +28,20 @@ def test_url():
             new_metadata = extract_metadata(url)
             print("\nNew metadata:")
             print(json.dumps(new_metadata, indent=2))
+            if 'error' not in new_metadata:
+                store_metadata(TEST_CHAT_ID, url, new_metadata)
             
             # Show stored metadata
-            with open(db_path, 'r') as f:
-                stored_data = json.load(f)
-                if url in stored_data:
-                    print("\nStored metadata:")
-                    print(json.dumps(stored_data[url], indent=2))
-                    
-                    # Verify metadata matches
-                    if new_metadata == stored_data[url]['metadata']:
-                        print("\n✅ Verification: Stored metadata matches extracted metadata")
-                    else:
-                        print("\n❌ Verification: Metadata mismatch!")
+            stored = store.get(TEST_CHAT_ID, url)
+            if stored:
+                print("\nStored metadata:")
+                print(json.dumps(stored, indent=2))
+
+                # Verify metadata matches
+                if new_metadata == stored['metadata']:
+                    print("\n✅ Verification: Stored metadata matches extracted metadata")
+                else:
+                    print("\n❌ Verification: Metadata mismatch!")
                 
         except Exception as e:
             print(f"\n❌ Error occurred: {str(e)}")
@@ -0,0 +1,103 @@
+"""Regression check for polling through the DispatchingTeleBot.
+
+Drives telebot's own polling loop against a stand-in getUpdates that
+honours ``offset`` like the real Bot API, with slow handlers so updates
+are still queued when the next poll happens. Every message must be
+handled exactly once, and updates dropped by the rate limiter must stay
+dropped instead of being fetched again, with a single "slow down" reply.
+
+Example:
+    python Bot/tests/polling_test.py
+"""
+import os
+import sys
+import threading
+import time
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+sys.path.insert(0, TESTS_DIR)
+
+from telebot import types  # noqa: E402
+
+from fake_telegram import make_message_update  # noqa: E402
+from utils.dispatcher import DispatchingTeleBot  # noqa: E402
+
+HANDLER_SECONDS = 0.3
+
+
+class OffsetBot(DispatchingTeleBot):
+    """Serves queued updates from memory, confirming them by ``offset`` as Telegram does."""
+
+    def __init__(self, updates, **kwargs):
+        super().__init__('123456:polling', **kwargs)
+        self.pending = [types.Update.de_json(update) for update in updates]
+        self.polls = 0
+        self.sent = []
+
+    def send_message(self, chat_id, text, *args, **kwargs):
+        self.sent.append((chat_id, text))
+
+    def get_updates(self, offset=None, *args, **kwargs):
+        self.polls += 1
+        self.pending = [update for update in self.pending if offset is None or update.update_id >= offset]
+        time.sleep(0.05)
+        return list(self.pending)
+
+
+class RejectAll:
+    """Rate limiter that drops every update and asks for one notice per user."""
+
+    def __init__(self):
+        self.checks = 0
+        self.notified = set()
+
+    def allow(self, user_id) -> bool:
+        self.checks += 1
+        return False
+
+    def should_notify(self, user_id) -> bool:
+        if user_id in self.notified:
+            return False
+        self.notified.add(user_id)
+        return True
+
+
+def run(updates, limiter=None, seconds: float = 2.0):
+    bot = OffsetBot(updates, workers=2, limiter=limiter)
+    handled = []
+    lock = threading.Lock()
+
+    @bot.message_handler(func=lambda message: True)
+    def record(message):
+        time.sleep(HANDLER_SECONDS)
+        with lock:
+            handled.append(message.text)
+
+    poller = threading.Thread(
+        target=bot._TeleBot__non_threaded_polling, kwargs={'non_stop': True, 'interval': 0}, daemon=True
+    )
+    poller.start()
+    time.sleep(seconds)
+    bot.stop_polling()
+    poller.join(5)
+    return bot, handled
+
+
+def main():
+    updates = [make_message_update(chat_id, text) for chat_id, text in ((1, 'm1'), (2, 'm2'), (2, 'm3'))]
+    bot, handled = run(updates)
+    print(f"Handled {handled} over {bot.polls} polls")
+    assert sorted(handled) == ['m1', 'm2', 'm3'], f"updates handled more than once: {handled}"
+
+    limiter = RejectAll()
+    flood = [make_message_update(3, text) for text in ('flood 1', 'flood 2')]
+    bot, handled = run(flood, limiter=limiter, seconds=1.0)
+    print(f"Rate limited updates checked {limiter.checks} times over {bot.polls} polls, {len(bot.sent)} notices")
+    assert not handled and limiter.checks == 2, "a dropped update was fetched again"
+    assert len(bot.sent) == 1 and bot.sent[0][0] == 3, f"expected one notice to chat 3: {bot.sent}"
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
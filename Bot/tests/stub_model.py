@@ -0,0 +1,82 @@
+"""Local stand-in for the Gemini model used by the AI enhancer.
+
+StubModel answers the enhancer's batched JSON prompt without network
+access, so the background enhancement stage can be exercised end to end.
+
+Example:
+    python Bot/tests/stub_model.py --links 50 --latency 0.2
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ai_helper import AIEnhancer, EnhancementQueue
+from utils.storage import LinkStore
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubModel:
+    """Echoes each link back with a marked title, after an optional delay."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.items = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str) -> StubResponse:
+        links = json.loads(prompt[prompt.index('Links:') + len('Links:'):])
+        with self._lock:
+            self.calls += 1
+            self.items += len(links)
+        time.sleep(self.latency)
+
+        reply = [
+            {'id': link['id'], 'title': f"✨ {link['title']}", 'description': link['description'][:150]}
+            for link in links
+        ]
+        return StubResponse(f"```json\n{json.dumps(reply)}\n```")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the enhancement queue against a stub model.")
+    parser.add_argument('--links', type=int, default=40)
+    parser.add_argument('--duplicates', type=int, default=10, help="links repeating an earlier title")
+    parser.add_argument('--latency', type=float, default=0.1, help="seconds per model request")
+    parser.add_argument('--qps', type=float, default=5)
+    args = parser.parse_args()
+
+    model = StubModel(args.latency)
+    with tempfile.TemporaryDirectory() as directory:
+        store = LinkStore(os.path.join(directory, 'links.db'))
+        enhancer = EnhancementQueue(AIEnhancer(model), store, qps=args.qps, batch_wait=0.2).start()
+
+        started = time.perf_counter()
+        for index in range(args.links):
+            title = f"Page {index % (args.links - args.duplicates)}"
+            metadata = {'title': title, 'description': f"About {title.lower()}"}
+            record_id = store.add(1, f"https://example.com/{index}", metadata)
+            enhancer.submit(1, record_id, metadata)
+        enhancer.jobs.join()
+        elapsed = time.perf_counter() - started
+
+        enhanced = sum(1 for record in store.iter_page(1, 0, args.links)
+                       if record['metadata']['title'].startswith('✨'))
+        print(f"Enhanced {enhanced}/{args.links} links in {elapsed:.2f}s")
+        print(f"Model requests: {model.calls} for {model.items} links "
+              f"(cache hits {enhancer.hits}, misses {enhancer.misses})")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
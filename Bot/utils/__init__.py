@@ -1,3 +1,9 @@
-from .metadata import extract_metadata
+__all__ = ['extract_metadata']
 
-__all__ = ['extract_metadata']
\ No newline at end of file
+
+def __getattr__(name):
+    # Imported on first use so importing any utils module stays light
+    if name == 'extract_metadata':
+        from .metadata import extract_metadata
+        return extract_metadata
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,44 +1,250 @@
-import google.generativeai as genai
-import os
+import hashlib
+import json
 import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from config import (
+    AI_BATCH_SIZE,
+    AI_BATCH_WAIT,
+    AI_CACHE_SIZE,
+    AI_MODEL_NAME,
+    AI_QPS,
+    AI_QUEUE_SIZE,
+    AI_WORKERS,
+)
+from .rate_limiter import TokenBucket
 
 logger = logging.getLogger(__name__)
 
+MAX_TITLE_LENGTH = 60
+MAX_DESCRIPTION_LENGTH = 150
+
+
 class AIEnhancer:
-    def __init__(self):
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-        self.model = genai.GenerativeModel('gemini-pro')
+    """Rewrites link titles and descriptions with a generative model.
+
+    ``model`` is anything with a ``generate_content(prompt)`` method whose
+    result has a ``.text`` attribute, so a local stub can stand in for
+    Gemini. Without one, a Gemini model is created from ``GEMINI_API_KEY``.
+    """
+
+    def __init__(self, model=None):
+        if model is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+            model = genai.GenerativeModel(AI_MODEL_NAME)
+        self.model = model
+
+    @staticmethod
+    def build_prompt(items: Sequence[Tuple[str, str]]) -> str:
+        links = [
+            {'id': index, 'title': title, 'description': description}
+            for index, (title, description) in enumerate(items)
+        ]
+        return (
+            f"For each link below, write a concise and engaging title (max {MAX_TITLE_LENGTH} chars) "
+            f"and a brief description (max {MAX_DESCRIPTION_LENGTH} chars).\n"
+            'Reply with only a JSON array holding one {"id", "title", "description"} object '
+            "per link, using the same ids.\n\n"
+            f"Links:\n{json.dumps(links, ensure_ascii=False)}"
+        )
+
+    @staticmethod
+    def parse_reply(text: str, count: int) -> List[Optional[Dict[str, str]]]:
+        """Pull the enhanced entries out of a model reply, one per input (None if missing)."""
+        results: List[Optional[Dict[str, str]]] = [None] * count
+        start, end = text.find('['), text.rfind(']')
+        if start == -1 or end < start:
+            raise ValueError("Reply does not contain a JSON array")
+
+        for entry in json.loads(text[start:end + 1]):
+            if not isinstance(entry, dict):
+                continue
+            index, title, description = entry.get('id'), entry.get('title'), entry.get('description')
+            if isinstance(index, int) and 0 <= index < count and isinstance(title, str) and title.strip():
+                results[index] = {
+                    'title': title.strip()[:MAX_TITLE_LENGTH],
+                    'description': (description or '').strip()[:MAX_DESCRIPTION_LENGTH]
+                    if isinstance(description, str) else '',
+                }
+        return results
+
+    def enhance_batch(self, items: Sequence[Tuple[str, str]]) -> List[Optional[Dict[str, str]]]:
+        """Enhance several (title, description) pairs with a single model request."""
+        response = self.model.generate_content(self.build_prompt(items))
+        return self.parse_reply(response.text, len(items))
 
     def enhance_metadata(self, title: str, description: str) -> dict:
         """Enhance title and description using Gemini AI."""
         try:
-            prompt = (
-                f"Original Title: {title}\n"
-                f"Original Description: {description}\n\n"
-                "Create a concise and engaging title (max 60 chars) and "
-                "brief description (max 150 chars). "
-                "Format:\nTitle: [enhanced]\nDescription: [enhanced]"
+            enhanced = self.enhance_batch([(title, description)])[0]
+            if enhanced:
+                return {**enhanced, 'original': {'title': title, 'description': description}}
+        except Exception as e:
+            logger.error("AI enhancement error: %s", e)
+        return {
+            'title': title,
+            'description': description
+        }
+
+
+class EnhancementJob(NamedTuple):
+    chat_id: int
+    record_id: int
+    title: str
+    description: str
+
+
+class EnhancementQueue:
+    """Enhances saved links in the background, in batches, within a request budget.
+
+    Saving a link never waits for the model: ``submit`` only queues the
+    record. Workers collect up to ``batch_size`` jobs (waiting at most
+    ``batch_wait`` seconds for a batch to fill), answer what they can from an
+    LRU cache keyed by a hash of title and description, and send the rest
+    to the model as one request. Requests across all workers are limited to
+    ``qps`` per second. Results are written back with
+    :meth:`LinkStore.update_metadata`, which skips records that were deleted
+    or re-saved in the meantime.
+    """
+
+    def __init__(self, enhancer: AIEnhancer, store=None, batch_size: int = AI_BATCH_SIZE,
+                 batch_wait: float = AI_BATCH_WAIT, qps: float = AI_QPS, workers: int = AI_WORKERS,
+                 cache_size: int = AI_CACHE_SIZE, queue_size: int = AI_QUEUE_SIZE):
+        # A zero rate would never refill the budget, and workers would divide by it
+        if qps <= 0:
+            raise ValueError(f"AI_QPS must be greater than 0, got {qps}")
+        if store is None:
+            from .storage import get_store
+            store = get_store()
+
+        self.enhancer = enhancer
+        self.store = store
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.workers = workers
+        self.cache_size = cache_size
+        self.jobs: "queue.Queue[EnhancementJob]" = queue.Queue(maxsize=queue_size)
+
+        self._budget = TokenBucket(qps, 1)
+        self._budget_lock = threading.Lock()
+        self._cache: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._started = False
+
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0
+
+    def start(self) -> 'EnhancementQueue':
+        if not self._started:
+            self._started = True
+            for index in range(self.workers):
+                threading.Thread(target=self._work, name=f'ai-enhancer-{index}', daemon=True).start()
+        return self
+
+    def submit(self, chat_id: int, record_id: int, metadata: Dict[str, Any]) -> bool:
+        """Queue a stored record for enhancement; return False if it was not queued."""
+        title, description = metadata.get('title') or '', metadata.get('description') or ''
+        if not title and not description:
+            return False
+        try:
+            self.jobs.put_nowait(EnhancementJob(chat_id, record_id, title, description))
+            return True
+        except queue.Full:
+            logger.warning("Enhancement queue full, skipping record %s", record_id)
+            return False
+
+    @staticmethod
+    def cache_key(title: str, description: str) -> str:
+        return hashlib.sha256(f"{title}\0{description}".encode('utf-8')).hexdigest()
+
+    def _next_batch(self) -> List[EnhancementJob]:
+        batch = [self.jobs.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.jobs.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _wait_for_budget(self) -> None:
+        while True:
+            with self._budget_lock:
+                if self._budget.consume():
+                    return
+                wait = (1 - self._budget.tokens) / self._budget.rate
+            time.sleep(wait)
+
+    def _work(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                self.process(batch)
+            except Exception as e:
+                logger.error("AI enhancement of %s links failed: %s", len(batch), e)
+            finally:
+                for _ in batch:
+                    self.jobs.task_done()
+
+    def process(self, batch: List[EnhancementJob]) -> None:
+        """Enhance one batch of jobs and write the results to the store."""
+        keys = [self.cache_key(job.title, job.description) for job in batch]
+        results: Dict[str, Dict[str, str]] = {}
+        missing: Dict[str, Tuple[str, str]] = {}
+
+        with self._cache_lock:
+            for key, job in zip(keys, batch):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    results[key] = cached
+                    self.hits += 1
+                elif key not in missing:
+                    missing[key] = (job.title, job.description)
+                    self.misses += 1
+
+        if missing:
+            self._wait_for_budget()
+            self.requests += 1
+            enhanced = self.enhancer.enhance_batch(list(missing.values()))
+            with self._cache_lock:
+                for key, entry in zip(missing, enhanced):
+                    if entry is None:
+                        continue
+                    results[key] = self._cache[key] = entry
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+
+        for key, job in zip(keys, batch):
+            entry = results.get(key)
+            if entry is None:
+                continue
+            self.store.update_metadata(
+                job.chat_id, job.record_id, entry,
+                expected={'title': job.title, 'description': job.description}
             )
 
-            response = self.model.generate_content(prompt)
-            
-            # Parse the response
-            lines = response.text.split('\n')
-            enhanced_title = lines[0].replace('Title: ', '').strip()
-            enhanced_description = lines[1].replace('Description: ', '').strip()
-
-            return {
-                'title': enhanced_title,
-                'description': enhanced_description,
-                'original': {
-                    'title': title,
-                    'description': description
-                }
-            }
 
-        except Exception as e:
-            logger.error(f"AI enhancement error: {e}")
-            return {
-                'title': title,
-                'description': description
-            }
\ No newline at end of file
+_enhancement_queue: Optional[EnhancementQueue] = None
+_enhancement_lock = threading.Lock()
+
+
+def get_enhancement_queue() -> EnhancementQueue:
+    """Return the shared enhancement queue backed by Gemini, starting it on first use."""
+    global _enhancement_queue
+    if _enhancement_queue is None:
+        with _enhancement_lock:
+            if _enhancement_queue is None:
+                _enhancement_queue = EnhancementQueue(AIEnhancer()).start()
+    return _enhancement_queue
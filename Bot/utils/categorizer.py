@@ -0,0 +1,335 @@
+import logging
+import re
+import threading
+import time
+import zlib
+from itertools import chain, islice
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from config import CATEGORY_BATCH_SIZE, CATEGORY_FIT_LINKS, CATEGORY_HASH_BITS, CATEGORY_MIN_SCORE
+from .search import TOKEN_RE
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORY = 'Other'
+
+# Seed lexicon: words that suggest a category, and sites that almost always belong to it.
+# Keywords are matched after plural folding, so list the singular form only once.
+CATEGORY_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    'Development': (
+        'python', 'javascript', 'typescript', 'java', 'rust', 'golang', 'api', 'code', 'coding',
+        'programming', 'developer', 'library', 'framework', 'github', 'repository', 'git', 'docker',
+        'kubernetes', 'sql', 'database', 'linux', 'debug', 'compiler', 'backend', 'frontend',
+        'npm', 'pip', 'sdk', 'cli', 'devops', 'software', 'documentation',
+    ),
+    'News': (
+        'news', 'breaking', 'election', 'government', 'politics', 'president', 'minister', 'war',
+        'headline', 'journalism', 'parliament',
+    ),
+    'Video': (
+        'video', 'youtube', 'streaming', 'episode', 'trailer', 'movie', 'film', 'vlog',
+        'documentary', 'netflix', 'tv',
+    ),
+    'Music': (
+        'music', 'song', 'album', 'playlist', 'lyrics', 'artist', 'band', 'concert', 'spotify',
+        'podcast', 'audio', 'remix',
+    ),
+    'Shopping': (
+        'buy', 'shop', 'shopping', 'price', 'sale', 'deal', 'discount', 'cart', 'product',
+        'shipping', 'amazon', 'coupon',
+    ),
+    'Social': (
+        'twitter', 'tweet', 'instagram', 'facebook', 'reddit', 'linkedin', 'follower', 'forum',
+        'telegram', 'discord', 'tiktok',
+    ),
+    'Learning': (
+        'learn', 'learning', 'course', 'tutorial', 'guide', 'lesson', 'university', 'education',
+        'beginner', 'introduction', 'wiki', 'wikipedia', 'explained', 'handbook', 'cheatsheet',
+    ),
+    'Science': (
+        'science', 'research', 'study', 'paper', 'journal', 'physics', 'biology', 'chemistry',
+        'nasa', 'climate', 'experiment', 'arxiv', 'scientist', 'quantum', 'medicine', 'astronomy',
+    ),
+    'Finance': (
+        'finance', 'money', 'stock', 'market', 'invest', 'investing', 'investment', 'bank',
+        'crypto', 'bitcoin', 'trading', 'economy', 'tax', 'loan', 'earnings',
+    ),
+    'Food': (
+        'recipe', 'food', 'cooking', 'cook', 'bake', 'baking', 'dinner', 'lunch', 'breakfast',
+        'restaurant', 'kitchen', 'vegan', 'meal', 'delicious', 'chicken', 'cake',
+    ),
+    'Travel': (
+        'travel', 'trip', 'hotel', 'flight', 'booking', 'tour', 'destination', 'vacation', 'beach',
+        'visa', 'airport', 'itinerary',
+    ),
+}
+
+CATEGORY_DOMAINS: Dict[str, Tuple[str, ...]] = {
+    'Development': ('github.com', 'gitlab.com', 'stackoverflow.com', 'pypi.org', 'npmjs.com',
+                    'docs.python.org', 'developer.mozilla.org', 'dev.to'),
+    'News': ('bbc.com', 'bbc.co.uk', 'cnn.com', 'reuters.com', 'nytimes.com', 'theguardian.com',
+             'apnews.com', 'aljazeera.com'),
+    'Video': ('youtube.com', 'youtu.be', 'vimeo.com', 'twitch.tv', 'netflix.com', 'dailymotion.com'),
+    'Music': ('spotify.com', 'soundcloud.com', 'music.apple.com', 'bandcamp.com'),
+    'Shopping': ('amazon.com', 'ebay.com', 'aliexpress.com', 'etsy.com', 'flipkart.com'),
+    'Social': ('twitter.com', 'x.com', 'instagram.com', 'facebook.com', 'reddit.com',
+               'linkedin.com', 't.me', 'tiktok.com'),
+    'Learning': ('coursera.org', 'udemy.com', 'khanacademy.org', 'edx.org', 'wikipedia.org',
+                 'medium.com', 'w3schools.com'),
+    'Science': ('arxiv.org', 'nature.com', 'sciencedirect.com', 'nasa.gov', 'science.org'),
+    'Finance': ('bloomberg.com', 'investopedia.com', 'coinmarketcap.com', 'finance.yahoo.com'),
+    'Food': ('allrecipes.com', 'seriouseats.com', 'bonappetit.com', 'foodnetwork.com'),
+    'Travel': ('booking.com', 'tripadvisor.com', 'airbnb.com', 'expedia.com', 'lonelyplanet.com'),
+}
+
+CATEGORIES: Tuple[str, ...] = tuple(CATEGORY_KEYWORDS) + (DEFAULT_CATEGORY,)
+
+# Feature weights by where a token was found (index 0 is the per-link pad)
+FIELD_WEIGHTS = (0.0, 2.0, 1.0, 4.0)  # pad, title, description, domain
+
+# Labelled occurrences a feature needs before its fitted weight reaches half strength
+FIT_EVIDENCE = 5
+
+# Cached token hashes kept at most; the cache starts over beyond this
+HASH_CACHE_SIZE = 1 << 18
+
+# Words whose trailing "s" is not a plural
+UNFOLDED = frozenset({'news', 'series', 'species'})
+
+HOST_RE = re.compile(r"^[a-z][a-z0-9+.-]*://(?:[^@/?#]*@)?([^:/?#]+)", re.IGNORECASE)
+
+
+def fold_token(token: str) -> str:
+    """Fold plural and singular forms together, so 'tutorials' and 'tutorial' are one feature."""
+    if len(token) <= 3 or token in UNFOLDED:
+        return token
+    if token.endswith('ies'):
+        return token[:-1]  # studies -> studie
+    if token[-1] == 'y' and token[-2] not in 'aeiou':
+        return token[:-1] + 'ie'  # study -> studie
+    if token.endswith(('sses', 'shes', 'ches', 'xes', 'zes')):
+        return token[:-2]
+    if token[-1] == 's' and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+class TokenHashes(dict):
+    """CRC32 of each folded token, computed on first lookup.
+
+    The same words recur across links, and a dict hit is much cheaper
+    than folding and hashing again.
+    """
+
+    def __missing__(self, token: str) -> int:
+        value = self[token] = zlib.crc32(fold_token(token).encode('utf-8'))
+        return value
+
+
+def domain_features(url: str) -> List[str]:
+    """Return ``host:`` features for a URL's host and its parent domain."""
+    match = HOST_RE.match(url)
+    if not match:
+        return []
+    host = match.group(1).lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    features = [f"host:{host}"]
+    parent = '.'.join(host.split('.')[-2:])
+    if parent != host:
+        features.append(f"host:{parent}")
+    return features
+
+
+class Categorizer:
+    """Linear classifier over hashed title, description and domain features.
+
+    Every token (folded to its singular) and domain is hashed (CRC32) into
+    one of ``2 ** hash_bits`` feature columns, and the weight matrix holds a
+    row of per-category weights for each column. It starts from
+    :data:`CATEGORY_KEYWORDS` and :data:`CATEGORY_DOMAINS`; :meth:`fit` then
+    learns a weight for every other feature from the stored links. A
+    keyword listed under several categories is split between them.
+
+    Classifying a batch builds one flat array of columns for all links and
+    scores them together: gather the feature rows, scale them by field
+    weight, and sum each link's slice with ``np.add.reduceat``. Links
+    scoring below ``min_score`` fall into :data:`DEFAULT_CATEGORY`.
+
+    numpy is imported when the first categorizer is built rather than with
+    this module, so startup and the lexicon helpers do not pay for it.
+    """
+
+    def __init__(self, hash_bits: int = CATEGORY_HASH_BITS, min_score: float = CATEGORY_MIN_SCORE):
+        import numpy as np
+
+        self.features = 1 << hash_bits
+        self.min_score = min_score
+        self.labels = np.array(CATEGORIES, dtype=object)
+        self.field_weights = np.array(FIELD_WEIGHTS, dtype=np.float32)
+        # Row 0 is an all-zero pad that starts every link's slice
+        self.seed_weights = np.zeros((self.features + 1, len(CATEGORIES)), dtype=np.float32)
+        self._hashes = TokenHashes()
+
+        seeds: Dict[int, List[int]] = {}
+        for index, category in enumerate(CATEGORY_KEYWORDS):
+            for keyword in CATEGORY_KEYWORDS[category]:
+                seeds.setdefault(self._column(self._hashes[keyword]), []).append(index)
+            for domain in CATEGORY_DOMAINS.get(category, ()):
+                self.seed_weights[self._column(zlib.crc32(f"host:{domain}".encode('utf-8'))), index] += 1.0
+        for column, indexes in seeds.items():
+            self.seed_weights[column, indexes] += 1.0 / len(indexes)
+        self.weights = self.seed_weights
+
+    def _column(self, feature_hash: int) -> int:
+        return (feature_hash & (self.features - 1)) + 1
+
+    def _encode(self, records: Sequence[Dict[str, Any]]) -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+        """Flatten the records' features into ``(columns, weights, offsets)`` arrays."""
+        import numpy as np
+
+        if len(self._hashes) > HASH_CACHE_SIZE:
+            self._hashes = TokenHashes()
+        token_hash = self._hashes.__getitem__
+        findall = TOKEN_RE.findall
+        hashes: List[int] = []
+        counts: List[int] = []
+
+        for record in records:
+            metadata = record['metadata']
+            title = list(map(token_hash, findall((metadata.get('title') or '').lower())))
+            description = list(map(token_hash, findall((metadata.get('description') or '').lower())))
+            domain = [zlib.crc32(feature.encode('utf-8')) for feature in domain_features(record['url'])]
+            hashes.append(0)
+            hashes += title
+            hashes += description
+            hashes += domain
+            counts += (1, len(title), len(description), len(domain))
+
+        counts_array = np.array(counts, dtype=np.int64)
+        weights = np.repeat(np.tile(self.field_weights, len(records)), counts_array)
+        lengths = counts_array.reshape(-1, len(FIELD_WEIGHTS)).sum(axis=1)
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        columns = (np.array(hashes, dtype=np.int64) & (self.features - 1)) + 1
+        columns[offsets] = 0
+        return columns, weights, offsets
+
+    @staticmethod
+    def _score(weights: 'np.ndarray', columns: 'np.ndarray', field_weights: 'np.ndarray',
+               offsets: 'np.ndarray') -> 'np.ndarray':
+        import numpy as np
+
+        return np.add.reduceat(weights[columns] * field_weights[:, None], offsets, axis=0)
+
+    def fit(self, records: Sequence[Dict[str, Any]]) -> None:
+        """Learn a weight for every feature of ``records`` from their lexicon labels.
+
+        Links the seed weights classify confidently act as labelled
+        examples. A feature's fitted weight for a category is how far the
+        share of its labelled occurrences in that category exceeds the
+        category's share of labelled links, scaled to [0, 1] and shrunk by
+        ``FIT_EVIDENCE`` when the feature was seen only a few times. So
+        words that keep company with a category's keywords and sites count
+        towards it, while words common to every category stay near zero.
+        """
+        import numpy as np
+
+        if not records:
+            return
+        columns, field_weights, offsets = self._encode(records)
+        scores = self._score(self.seed_weights, columns, field_weights, offsets)
+        labels = scores.argmax(axis=1)
+        labelled = scores.max(axis=1) >= self.min_score
+        if not labelled.any():
+            return
+
+        # Occurrences of each feature per category, in labelled links only
+        lengths = np.diff(np.append(offsets, len(columns)))
+        links = np.repeat(np.arange(len(records)), lengths)
+        keep = labelled[links] & (columns > 0)
+        cells = columns[keep] * len(CATEGORIES) + labels[links[keep]]
+        counts = np.bincount(cells, minlength=(self.features + 1) * len(CATEGORIES)).reshape(-1, len(CATEGORIES))
+
+        totals = counts.sum(axis=1, keepdims=True).astype(np.float32)
+        prior = (np.bincount(labels[labelled], minlength=len(CATEGORIES)) / labelled.sum()).astype(np.float32)
+        share = np.divide(counts, totals, out=np.zeros(counts.shape, dtype=np.float32), where=totals > 0)
+        # How far past chance each feature points to a category, in [0, 1]
+        lift = np.divide(share - prior, 1.0 - prior, out=np.zeros_like(share), where=prior < 1.0)
+        np.clip(lift, 0.0, None, out=lift)
+        self.weights = self.seed_weights + lift * (totals / (totals + FIT_EVIDENCE))
+        logger.info("Fitted category weights on %s links (%s labelled)", len(records), int(labelled.sum()))
+
+    def scores(self, records: Sequence[Dict[str, Any]]) -> 'np.ndarray':
+        """Return a ``(len(records), len(CATEGORIES))`` score matrix."""
+        import numpy as np
+
+        if not records:
+            return np.zeros((0, len(CATEGORIES)), dtype=np.float32)
+        columns, weights, offsets = self._encode(records)
+        return self._score(self.weights, columns, weights, offsets)
+
+    def classify(self, records: Sequence[Dict[str, Any]]) -> List[str]:
+        """Return the best category for each record."""
+        scores = self.scores(records)
+        if not len(scores):
+            return []
+        best = scores.argmax(axis=1)
+        best[scores.max(axis=1) < self.min_score] = len(CATEGORIES) - 1
+        return self.labels[best].tolist()
+
+    def categorize(self, url: str, metadata: Dict[str, Any]) -> str:
+        """Return the category for a single link."""
+        return self.classify([{'url': url, 'metadata': metadata}])[0]
+
+
+def categorize_store(store, force: bool = False, batch_size: int = CATEGORY_BATCH_SIZE,
+                     fit_links: int = CATEGORY_FIT_LINKS) -> int:
+    """Fit the shared categorizer and assign categories to stored links; return how many were updated.
+
+    Weights are first fitted on up to ``fit_links`` stored links. Then only
+    uncategorized links are visited unless ``force`` is set, in which case
+    every link is re-categorized (e.g. after the lexicon changed).
+    """
+    started = time.perf_counter()
+    sample = list(islice(chain.from_iterable(store.iter_for_categorizing(batch_size, only_missing=False)), fit_links))
+    if not sample:
+        return 0
+    # Built here, so an empty store never loads numpy
+    categorizer = get_categorizer()
+    categorizer.fit(sample)
+    del sample
+
+    updated = 0
+    for batch in store.iter_for_categorizing(batch_size, only_missing=not force):
+        categories = categorizer.classify(batch)
+        store.set_categories(zip((record['id'] for record in batch), categories))
+        updated += len(batch)
+    if updated:
+        logger.info("Categorized %s links in %.2fs", updated, time.perf_counter() - started)
+    return updated
+
+
+_categorizer: Optional[Categorizer] = None
+_categorizer_lock = threading.Lock()
+
+
+def get_categorizer() -> Categorizer:
+    """Return the shared categorizer, building its weights on first use."""
+    global _categorizer
+    if _categorizer is None:
+        with _categorizer_lock:
+            if _categorizer is None:
+                _categorizer = Categorizer()
+    return _categorizer
+
+
+def find_category(name: str) -> Optional[str]:
+    """Match user input to a known category name, ignoring case."""
+    name = name.strip().lower()
+    for category in CATEGORIES:
+        if category.lower() == name:
+            return category
+    return None
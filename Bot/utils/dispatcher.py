@@ -0,0 +1,179 @@
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+import telebot
+
+from config import DISPATCH_CHAT_QUEUE, DISPATCH_MAX_PENDING, DISPATCH_WORKERS
+from .messages import ERROR_MESSAGES
+from .rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class DispatchFull(Exception):
+    """Raised by a non-blocking submit when the chat's queue or the dispatcher is full."""
+
+
+def update_chat_id(update) -> Optional[int]:
+    """Return the chat an update belongs to, or None if it has no conversation."""
+    for attr in ('message', 'edited_message', 'channel_post', 'edited_channel_post'):
+        message = getattr(update, attr, None)
+        if message is not None:
+            return message.chat.id
+
+    call = getattr(update, 'callback_query', None)
+    if call is not None:
+        return call.message.chat.id if call.message else call.from_user.id
+
+    for attr in ('inline_query', 'chosen_inline_result', 'shipping_query', 'pre_checkout_query'):
+        query = getattr(update, attr, None)
+        if query is not None:
+            return query.from_user.id
+    return None
+
+
+def update_user_id(update) -> Optional[int]:
+    """Return the user who sent an update, or None for channel posts and the like."""
+    for attr in ('message', 'edited_message', 'callback_query', 'inline_query',
+                 'chosen_inline_result', 'shipping_query', 'pre_checkout_query'):
+        event = getattr(update, attr, None)
+        if event is not None:
+            user = getattr(event, 'from_user', None)
+            return user.id if user else None
+    return None
+
+
+class ChatDispatcher:
+    """Runs updates on a worker pool while keeping each chat's updates in order.
+
+    Every chat has its own FIFO queue and at most one worker processes a chat
+    at a time, so multi-step flows like /del -> numbers -> yes see their
+    messages in the order they were sent. Different chats run in parallel.
+    A chat's queue holds at most ``max_per_chat`` updates and the dispatcher
+    at most ``max_pending`` overall; beyond that ``submit`` blocks (or raises
+    :class:`DispatchFull` when ``block`` is False).
+    """
+
+    def __init__(self, handler: Callable[[Any], None], workers: int = DISPATCH_WORKERS,
+                 max_per_chat: int = DISPATCH_CHAT_QUEUE, max_pending: int = DISPATCH_MAX_PENDING):
+        self.handler = handler
+        self.workers = workers
+        self.max_per_chat = max_per_chat
+        self.max_pending = max_pending
+
+        self._queues: Dict[Any, Deque] = {}
+        self._ready: Deque = deque()  # chats with queued updates and no worker on them
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._has_work = threading.Condition(self._lock)
+        self._has_room = threading.Condition(self._lock)
+        self._started = False
+
+    def start(self) -> 'ChatDispatcher':
+        with self._lock:
+            if self._started:
+                return self
+            self._started = True
+        for index in range(self.workers):
+            threading.Thread(target=self._work, name=f'dispatch-{index}', daemon=True).start()
+        return self
+
+    def submit(self, update, block: bool = True, timeout: Optional[float] = None) -> None:
+        """Queue an update behind the earlier updates from the same chat."""
+        chat_id = update_chat_id(update)
+        # Updates without a chat have nothing to stay ordered with
+        key = chat_id if chat_id is not None else ('update', update.update_id)
+
+        with self._lock:
+            while self._is_full(key):
+                if not block:
+                    raise DispatchFull(f"Too many queued updates for chat {chat_id}")
+                if not self._has_room.wait(timeout):
+                    raise DispatchFull(f"Timed out queueing update for chat {chat_id}")
+
+            chat_queue = self._queues.get(key)
+            if chat_queue is None:
+                # A chat with no queue is neither running nor ready
+                chat_queue = self._queues[key] = deque()
+                self._ready.append(key)
+                self._has_work.notify()
+            chat_queue.append(update)
+            self._pending += 1
+
+    def _is_full(self, key) -> bool:
+        chat_queue = self._queues.get(key)
+        return (self._pending >= self.max_pending
+                or (chat_queue is not None and len(chat_queue) >= self.max_per_chat))
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                while not self._ready:
+                    self._has_work.wait()
+                key = self._ready.popleft()
+                update = self._queues[key].popleft()
+                self._pending -= 1
+                self._has_room.notify_all()
+
+            try:
+                self.handler(update)
+            except Exception as e:
+                logger.error("Error handling update %s: %s", update.update_id, e, exc_info=True)
+
+            with self._lock:
+                if self._queues[key]:
+                    # Back of the line, so a busy chat cannot starve the others
+                    self._ready.append(key)
+                    self._has_work.notify()
+                else:
+                    del self._queues[key]
+
+    def pending(self) -> int:
+        """Return how many updates are queued and not yet picked up."""
+        with self._lock:
+            return self._pending
+
+
+class DispatchingTeleBot(telebot.TeleBot):
+    """TeleBot whose updates run through a :class:`ChatDispatcher`.
+
+    Handlers execute on the dispatcher's workers instead of telebot's own
+    unordered worker pool, so polling and webhook delivery both get
+    per-chat ordering. Updates over the ``limiter``'s rate are dropped
+    before they are queued, and their sender gets an occasional reply
+    asking them to slow down.
+    """
+
+    def __init__(self, token: str, workers: int = DISPATCH_WORKERS,
+                 limiter: Optional[RateLimiter] = None, **kwargs):
+        kwargs['threaded'] = False
+        super().__init__(token, **kwargs)
+        self.limiter = limiter
+        self.dispatcher = ChatDispatcher(self._handle_update, workers=workers).start()
+
+    def _handle_update(self, update) -> None:
+        super().process_new_updates([update])
+
+    def process_new_updates(self, updates) -> None:
+        for update in updates:
+            # telebot moves the polling offset only once a worker handles the update;
+            # until then every getUpdates would fetch it again, including dropped ones
+            self.last_update_id = max(self.last_update_id, update.update_id)
+            user_id = update_user_id(update)
+            if self.limiter and not self.limiter.allow(user_id):
+                logger.debug("Rate limited update %s from user %s", update.update_id, user_id)
+                if user_id is not None and self.limiter.should_notify(user_id):
+                    self._send_rate_limit_notice(update)
+                continue
+            self.dispatcher.submit(update)
+
+    def _send_rate_limit_notice(self, update) -> None:
+        chat_id = update_chat_id(update)
+        if chat_id is None:
+            return
+        try:
+            self.send_message(chat_id, ERROR_MESSAGES['rate_limited'])
+        except Exception as e:
+            logger.error("Error sending rate limit notice to chat %s: %s", chat_id, e)
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Optional
+
+from config import FETCH_BUDGET, FETCH_QUEUE_SIZE, FETCH_WORKERS
+from .metadata import MetadataCache
+from .metrics import STAGE_SECONDS
+
+if TYPE_CHECKING:
+    from .http_client import HttpClient
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineFull(Exception):
+    """Raised when the fetch queue cannot accept more URLs."""
+
+
+class FetchPipeline:
+    """Fetches link metadata on a background asyncio loop.
+
+    URLs are queued from any thread with :meth:`submit` and drained by a fixed
+    number of worker tasks sharing one pooled :class:`HttpClient`, so slow sites
+    only occupy a worker instead of the bot's handler threads.
+    """
+
+    def __init__(self, workers: int = FETCH_WORKERS, queue_size: int = FETCH_QUEUE_SIZE,
+                 budget: float = FETCH_BUDGET):
+        self.workers = workers
+        self.budget = budget
+        self.cache = MetadataCache()
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._client: Optional['HttpClient'] = None
+        self._ready = threading.Event()
+        self._callbacks = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fetch-callback')
+
+    def start(self) -> None:
+        """Start the event loop thread and wait until workers are running."""
+        thread = threading.Thread(target=self._run, name='fetch-pipeline', daemon=True)
+        thread.start()
+        self._ready.wait()
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._setup())
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _setup(self) -> None:
+        # aiohttp loads here, on the pipeline thread, instead of when the bot starts
+        from .http_client import HttpClient
+
+        self._client = HttpClient()
+        self._queue = asyncio.Queue()
+        for index in range(self.workers):
+            self._loop.create_task(self._worker(index))
+
+    def submit(self, url: str, on_done: Optional[Callable[[dict], None]] = None) -> Future:
+        """Queue a URL for fetching and return a future resolving to its metadata.
+
+        ``on_done`` is called with the metadata on a callback thread, never on
+        the event loop. Raises :class:`PipelineFull` when too many URLs are
+        already waiting.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PipelineFull(url)
+
+        future: Future = Future()
+        future.add_done_callback(lambda _: self._slots.release())
+        if on_done:
+            future.add_done_callback(lambda f: self._callbacks.submit(self._notify, on_done, f))
+
+        deadline = time.monotonic() + self.budget
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (url, deadline, future))
+        return future
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            url, deadline, future = await self._queue.get()
+            STAGE_SECONDS.observe(time.monotonic() - (deadline - self.budget), 'save', 'queue')
+            if not future.set_running_or_notify_cancel():
+                self._queue.task_done()
+                continue
+
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    result = {'error': 'Timed out waiting for a fetch worker'}
+                else:
+                    result = await asyncio.wait_for(self.cache.fetch(self._client, url), remaining)
+            except asyncio.TimeoutError:
+                result = {'error': f'Timed out after {self.budget}s'}
+            except Exception as e:
+                logger.error("Fetch worker %s failed on %s: %s", index, url, e)
+                result = {'error': str(e)}
+            finally:
+                self._queue.task_done()
+
+            future.set_result(result)
+
+    @staticmethod
+    def _notify(callback: Callable[[dict], None], future: Future) -> None:
+        try:
+            callback(future.result())
+        except Exception as e:
+            logger.error("Fetch callback error: %s", e, exc_info=True)
+
+    def queue_depth(self) -> int:
+        """Return the number of URLs waiting for a worker."""
+        return self._queue.qsize() if self._queue else 0
+
+
+_pipeline: Optional[FetchPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline() -> FetchPipeline:
+    """Return the shared fetch pipeline, starting it on first use."""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                pipeline = FetchPipeline()
+                pipeline.start()
+                _pipeline = pipeline
+    return _pipeline
@@ -0,0 +1,275 @@
+import io
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+
+import requests
+
+from config import (
+    EXPORT_BATCH_SIZE,
+    EXPORT_DRIVE_FOLDER_ID,
+    EXPORT_INTERVAL,
+    EXPORT_MAX_RETRIES,
+    EXPORT_RPS,
+    EXPORT_SHEET_NAME,
+    EXPORT_SPREADSHEET_ID,
+    EXPORT_TARGET,
+    GOOGLE_ACCESS_TOKEN,
+    GOOGLE_CREDENTIALS_FILE,
+    GOOGLE_DRIVE_API_URL,
+    GOOGLE_SHEETS_API_URL,
+)
+from .rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive.file']
+
+# Columns written for every change. The sheet holds one row per id; Drive files
+# list every change, and consumers keep the one with the highest seq per id.
+COLUMNS = ['seq', 'op', 'id', 'chat_id', 'url', 'title', 'description', 'category', 'timestamp']
+ID_COLUMN = 'C'
+LAST_COLUMN = 'I'
+
+# Sheet row of the first cell in an A1 range such as "Links!A5:I7"
+RANGE_START_ROW = re.compile(r"![A-Z]+(\d+)")
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ExportError(Exception):
+    """Raised when a batch could not be written after all retries."""
+
+
+class GoogleAuth:
+    """Supplies bearer tokens from a fixed token or a service account file.
+
+    google-auth is only imported when a credentials file is used, so local
+    runs against a fake API need nothing beyond ``GOOGLE_ACCESS_TOKEN``.
+    """
+
+    def __init__(self, token: str = GOOGLE_ACCESS_TOKEN, credentials_file: str = GOOGLE_CREDENTIALS_FILE):
+        self._token = token
+        self._credentials = None
+        if not token:
+            from google.oauth2 import service_account
+
+            self._credentials = service_account.Credentials.from_service_account_file(
+                credentials_file, scopes=SCOPES
+            )
+
+    def header(self) -> Dict[str, str]:
+        if self._credentials is not None:
+            if not self._credentials.valid:
+                from google.auth.transport.requests import Request
+
+                self._credentials.refresh(Request())
+            return {'Authorization': f"Bearer {self._credentials.token}"}
+        return {'Authorization': f"Bearer {self._token}"}
+
+
+class ApiClient:
+    """Pooled HTTP session that throttles to ``rps`` and retries quota and server errors."""
+
+    def __init__(self, auth: GoogleAuth, rps: float = EXPORT_RPS, max_retries: int = EXPORT_MAX_RETRIES):
+        # A zero rate would never refill the budget, and _throttle would divide by it
+        if rps <= 0:
+            raise ValueError(f"EXPORT_RPS must be greater than 0, got {rps}")
+        self.auth = auth
+        self.max_retries = max_retries
+        self.requests = 0
+        self._session = requests.Session()
+        self._budget = TokenBucket(rps, 1)
+
+    def _throttle(self) -> None:
+        while not self._budget.consume():
+            time.sleep((1 - self._budget.tokens) / self._budget.rate)
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                **kwargs) -> requests.Response:
+        for attempt in range(self.max_retries + 1):
+            self._throttle()
+            self.requests += 1
+            try:
+                response = self._session.request(
+                    method, url, headers={**(headers or {}), **self.auth.header()},
+                    timeout=30, **kwargs
+                )
+            except requests.RequestException as e:
+                error, retry_after = str(e), ''
+            else:
+                if response.status_code < 400:
+                    return response
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+                if response.status_code not in RETRY_STATUSES:
+                    raise ExportError(error)
+                retry_after = response.headers.get('Retry-After', '')
+
+            if attempt < self.max_retries:
+                delay = max(min(2 ** attempt, 60), int(retry_after) if retry_after.isdigit() else 0)
+                logger.warning("Export request failed (%s), retrying in %ss", error, delay)
+                time.sleep(delay)
+        raise ExportError(error)
+
+
+def change_row(change: Dict[str, Any]) -> List[Any]:
+    metadata = change['metadata']
+    return [
+        change['seq'], change['op'], change['id'], change['chat_id'], change['url'] or '',
+        metadata.get('title') or '', metadata.get('description') or '',
+        change['category'] or '', change['timestamp'] or '',
+    ]
+
+
+class SheetsSink:
+    """Keeps one row per link in a Google Sheet, rewritten in place when the link changes.
+
+    The sheet's row for each id is read from the id column on the first
+    write and tracked from then on. A batch costs at most two API calls: a
+    ``values:batchUpdate`` for links already in the sheet and a
+    ``values:append`` for new ones. A deleted link keeps its row with op
+    ``delete`` and empty fields, so rows never move. Resending a batch after
+    an interruption rewrites the same rows instead of adding duplicates.
+    """
+
+    name = 'sheets'
+
+    def __init__(self, client: ApiClient, spreadsheet_id: str = EXPORT_SPREADSHEET_ID,
+                 sheet_name: str = EXPORT_SHEET_NAME, base_url: str = GOOGLE_SHEETS_API_URL):
+        self.client = client
+        self.sheet = sheet_name
+        self.url = f"{base_url.rstrip('/')}/v4/spreadsheets/{spreadsheet_id}/values"
+        self._rows: Optional[Dict[int, int]] = None
+
+    def _load_rows(self) -> Dict[int, int]:
+        """Map every id already in the sheet to its row number."""
+        response = self.client.request(
+            'GET', f"{self.url}/{quote(self.sheet)}!{ID_COLUMN}:{ID_COLUMN}",
+            params={'majorDimension': 'COLUMNS'}
+        )
+        ids = (response.json().get('values') or [[]])[0]
+        return {int(value): row for row, value in enumerate(ids, 1) if str(value).isdigit()}
+
+    def write(self, changes: List[Dict[str, Any]]) -> None:
+        if self._rows is None:
+            self._rows = self._load_rows()
+
+        updates = [change for change in changes if change['id'] in self._rows]
+        added = [change for change in changes if change['id'] not in self._rows]
+        if updates:
+            data = []
+            for change in updates:
+                row = self._rows[change['id']]
+                data.append({'range': f"{self.sheet}!A{row}:{LAST_COLUMN}{row}", 'values': [change_row(change)]})
+            self.client.request('POST', f"{self.url}:batchUpdate", json={'valueInputOption': 'RAW', 'data': data})
+        if added:
+            response = self.client.request(
+                'POST', f"{self.url}/{quote(self.sheet)}!A1:append",
+                params={'valueInputOption': 'RAW', 'insertDataOption': 'INSERT_ROWS'},
+                json={'values': [change_row(change) for change in added]}
+            )
+            match = RANGE_START_ROW.search(response.json().get('updates', {}).get('updatedRange', ''))
+            if match:
+                first = int(match.group(1))
+                self._rows.update((change['id'], first + offset) for offset, change in enumerate(added))
+            else:
+                # Positions unknown; read them from the sheet again before the next write
+                self._rows = None
+
+
+class DriveSink:
+    """Uploads each batch of changes as a JSON Lines file into a Drive folder."""
+
+    name = 'drive'
+
+    def __init__(self, client: ApiClient, folder_id: str = EXPORT_DRIVE_FOLDER_ID,
+                 base_url: str = GOOGLE_DRIVE_API_URL):
+        self.client = client
+        self.folder_id = folder_id
+        self.url = f"{base_url.rstrip('/')}/upload/drive/v3/files"
+
+    def write(self, changes: List[Dict[str, Any]]) -> None:
+        # Names sort in export order and repeat on a resend, so duplicates are easy to spot
+        name = f"metamind-changes-{changes[0]['seq']:012d}-{changes[-1]['seq']:012d}.jsonl"
+        content = io.StringIO()
+        for change in changes:
+            content.write(json.dumps(dict(zip(COLUMNS, change_row(change))), ensure_ascii=False) + '\n')
+
+        boundary = uuid.uuid4().hex
+        metadata = {'name': name, 'mimeType': 'application/x-ndjson'}
+        if self.folder_id:
+            metadata['parents'] = [self.folder_id]
+        body = (
+            f"--{boundary}\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n"
+            f"{json.dumps(metadata)}\r\n"
+            f"--{boundary}\r\nContent-Type: application/x-ndjson\r\n\r\n"
+            f"{content.getvalue()}\r\n--{boundary}--"
+        ).encode('utf-8')
+        self.client.request(
+            'POST', self.url, params={'uploadType': 'multipart'}, data=body,
+            headers={'Content-Type': f"multipart/related; boundary={boundary}"}
+        )
+
+
+class Exporter:
+    """Streams the store's change feed to a sink in batches, resuming from a checkpoint.
+
+    Each run reads changes after the sink's checkpoint ``batch_size`` at a
+    time, writes them with one API call per batch and only then advances
+    the checkpoint. An interrupted run resends at most one batch on its
+    next start (rows carry their ``seq``, so repeats are recognisable), and
+    records that did not change since the last export are never sent again.
+    """
+
+    def __init__(self, store, sink, batch_size: int = EXPORT_BATCH_SIZE):
+        self.store = store
+        self.sink = sink
+        self.batch_size = batch_size
+        self.checkpoint_name = f"google-{sink.name}"
+        self._lock = threading.Lock()
+
+    def run_once(self) -> int:
+        """Export everything changed since the checkpoint and return how many changes were sent."""
+        with self._lock:
+            seq = self.store.export_checkpoint(self.checkpoint_name)
+            sent = 0
+            while True:
+                changes = self.store.changes_since(seq, self.batch_size)
+                if not changes:
+                    break
+                self.sink.write(changes)
+                seq = changes[-1]['seq']
+                self.store.save_export_checkpoint(self.checkpoint_name, seq)
+                sent += len(changes)
+            if sent:
+                logger.info("Exported %s changes to %s (checkpoint %s)", sent, self.sink.name, seq)
+            return sent
+
+    def run_forever(self, interval: float = EXPORT_INTERVAL) -> None:
+        while True:
+            try:
+                self.run_once()
+                self.store.prune_changes()
+            except Exception as e:
+                logger.error("Export to %s failed, will resume from checkpoint: %s", self.sink.name, e)
+            time.sleep(interval)
+
+
+def build_exporter(store=None, target: str = EXPORT_TARGET) -> Optional[Exporter]:
+    """Create the exporter configured by ``EXPORT_TARGET``, or None if exports are off."""
+    if not target:
+        return None
+    if store is None:
+        from .storage import get_store
+        store = get_store()
+
+    client = ApiClient(GoogleAuth())
+    sinks = {'sheets': SheetsSink, 'drive': DriveSink}
+    if target not in sinks:
+        raise ValueError(f"Unknown EXPORT_TARGET {target!r}, expected one of {', '.join(sinks)}")
+    return Exporter(store, sinks[target](client))
@@ -0,0 +1,131 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlparse
+
+from config import (
+    CIRCUIT_BASE_BACKOFF,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_MAX_BACKOFF,
+    NEGATIVE_CACHE_SIZE,
+    NEGATIVE_CACHE_TTL,
+)
+
+logger = logging.getLogger(__name__)
+
+# Statuses that say the host is refusing us, not that one page is missing
+HOST_FAILURE_STATUSES = {403, 429}
+
+# Hosts tracked at once; healthy hosts are never tracked
+MAX_TRACKED_HOSTS = 10000
+
+
+class FetchRejected(Exception):
+    """Raised instead of fetching a URL that is known to fail."""
+
+
+class HostCircuit:
+    """Failure counter and open/half-open state for one host."""
+
+    __slots__ = ('failures', 'trips', 'open_until')
+
+    def __init__(self):
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+
+
+class HostHealth:
+    """Per-host circuit breakers plus a short-lived cache of failed URLs.
+
+    After ``failure_threshold`` consecutive failures a host's circuit opens
+    and requests fail immediately. The circuit stays open for an exponential
+    backoff (``base_backoff * 2 ** (trips - 1)``, capped at ``max_backoff``)
+    or for a longer Retry-After. After that, one probe request is allowed
+    through per ``base_backoff`` window. Success closes the circuit; failure
+    reopens it for longer. Only used from the fetch pipeline's event loop, so
+    it needs no locking.
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 base_backoff: float = CIRCUIT_BASE_BACKOFF, max_backoff: float = CIRCUIT_MAX_BACKOFF,
+                 negative_ttl: float = NEGATIVE_CACHE_TTL, negative_size: int = NEGATIVE_CACHE_SIZE):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.negative_ttl = negative_ttl
+        self.negative_size = negative_size
+        self._circuits: "OrderedDict[str, HostCircuit]" = OrderedDict()
+        self._failed_urls: "OrderedDict[str, tuple]" = OrderedDict()
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return (urlparse(url).hostname or '').lower()
+
+    def check(self, url: str) -> None:
+        """Raise :class:`FetchRejected` if the URL or its host should not be fetched now."""
+        now = time.monotonic()
+
+        failed = self._failed_urls.get(url)
+        if failed:
+            expires_at, reason = failed
+            if expires_at > now:
+                raise FetchRejected(f"Recently failed: {reason}")
+            del self._failed_urls[url]
+
+        circuit = self._circuits.get(self._host(url))
+        if circuit is None or circuit.failures < self.failure_threshold:
+            return
+        if circuit.open_until > now:
+            raise FetchRejected(f"{self._host(url)} is unavailable, retrying in {int(circuit.open_until - now) + 1}s")
+
+        # Half-open: let this request probe the host and hold the others back
+        circuit.open_until = now + self.base_backoff
+
+    def record_success(self, url: str) -> None:
+        circuit = self._circuits.pop(self._host(url), None)
+        if circuit and circuit.trips:
+            logger.info("Circuit closed for %s", self._host(url))
+
+    def record_failure(self, url: str, reason: str, host_failure: bool = True,
+                       retry_after: Optional[float] = None) -> None:
+        """Remember a failed URL and, for host-level failures, count it against the host."""
+        now = time.monotonic()
+        self._failed_urls[url] = (now + self.negative_ttl, reason)
+        self._failed_urls.move_to_end(url)
+        while len(self._failed_urls) > self.negative_size:
+            self._failed_urls.popitem(last=False)
+
+        if not host_failure:
+            return
+
+        host = self._host(url)
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            circuit = self._circuits[host] = HostCircuit()
+            while len(self._circuits) > MAX_TRACKED_HOSTS:
+                self._circuits.popitem(last=False)
+        self._circuits.move_to_end(host)
+
+        circuit.failures += 1
+        if circuit.failures >= self.failure_threshold:
+            circuit.trips += 1
+            backoff = min(self.base_backoff * 2 ** (circuit.trips - 1), self.max_backoff)
+            circuit.open_until = now + max(backoff, retry_after or 0)
+            logger.warning("Circuit open for %s for %.0fs: %s", host, circuit.open_until - now, reason)
+
+    def record_status(self, url: str, status: int, retry_after: Optional[str] = None) -> None:
+        """Classify an HTTP status as success, page failure or host failure."""
+        if status < 400:
+            self.record_success(url)
+            return
+
+        host_failure = status in HOST_FAILURE_STATUSES or status >= 500
+        delay = float(retry_after) if retry_after and retry_after.isdigit() else None
+        self.record_failure(url, f"HTTP {status}", host_failure, delay)
+
+    def open_hosts(self) -> int:
+        """Return how many hosts currently have an open circuit."""
+        now = time.monotonic()
+        return sum(1 for circuit in self._circuits.values() if circuit.open_until > now)
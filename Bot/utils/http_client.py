@@ -0,0 +1,134 @@
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+import aiohttp
+
+from config import (
+    FETCH_BUDGET,
+    FETCH_CONNECT_TIMEOUT,
+    FETCH_READ_TIMEOUT,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_PER_HOST_CONCURRENCY,
+    HTTP_PER_HOST_RPS,
+    HTTP_POOL_SIZE,
+    HTTP_USER_AGENT,
+)
+from .host_health import FetchRejected, HostHealth
+from .metrics import FETCHES, fetch_result
+
+# Idle per-host limiters kept around before the least recently used are dropped
+MAX_TRACKED_HOSTS = 1024
+
+
+class HostLimiter:
+    """Caps concurrent requests and request rate for a single host."""
+
+    def __init__(self, concurrency: int, rps: float):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._interval = 1.0 / rps if rps > 0 else 0.0
+        self._next_slot = 0.0
+        self.active = 0
+
+    @asynccontextmanager
+    async def acquire(self):
+        self.active += 1
+        try:
+            async with self._semaphore:
+                if self._interval:
+                    now = time.monotonic()
+                    slot = max(now, self._next_slot)
+                    self._next_slot = slot + self._interval
+                    if slot > now:
+                        await asyncio.sleep(slot - now)
+                yield
+        finally:
+            self.active -= 1
+
+
+class HttpClient:
+    """Shared aiohttp client for metadata fetches.
+
+    One connector pools keep-alive connections per host and caches DNS
+    results. Requests to the same host are limited by
+    ``HTTP_PER_HOST_CONCURRENCY`` and ``HTTP_PER_HOST_RPS`` so popular sites
+    are not hammered. Hosts and URLs that keep failing are rejected up front
+    by :class:`HostHealth`. Must be created and used on a single event loop.
+    """
+
+    def __init__(self, per_host_concurrency: int = HTTP_PER_HOST_CONCURRENCY,
+                 per_host_rps: float = HTTP_PER_HOST_RPS):
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_rps = per_host_rps
+        self._hosts: "OrderedDict[str, HostLimiter]" = OrderedDict()
+        self.health = HostHealth()
+
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_SIZE,
+            limit_per_host=per_host_concurrency,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=FETCH_BUDGET,
+            sock_connect=FETCH_CONNECT_TIMEOUT,
+            sock_read=FETCH_READ_TIMEOUT
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers={'User-Agent': HTTP_USER_AGENT}
+        )
+
+    def _limiter(self, host: str) -> HostLimiter:
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            limiter = HostLimiter(self.per_host_concurrency, self.per_host_rps)
+            self._hosts[host] = limiter
+            self._prune()
+        self._hosts.move_to_end(host)
+        return limiter
+
+    def _prune(self) -> None:
+        if len(self._hosts) <= MAX_TRACKED_HOSTS:
+            return
+        for host in [host for host, limiter in self._hosts.items() if not limiter.active]:
+            del self._hosts[host]
+            if len(self._hosts) <= MAX_TRACKED_HOSTS:
+                break
+
+    @asynccontextmanager
+    async def get(self, url: str, **kwargs):
+        """Issue a GET within the host's limits; usable like ``session.get``.
+
+        Raises :class:`FetchRejected` without any network traffic when the URL
+        recently failed or its host's circuit is open.
+        """
+        host = (urlparse(url).hostname or '').lower()
+        try:
+            self.health.check(url)
+        except FetchRejected:
+            FETCHES.inc(host, fetch_result(error='rejected'))
+            raise
+        status = None
+        try:
+            async with self._limiter(host).acquire():
+                async with self._session.get(url, **kwargs) as response:
+                    status = response.status
+                    self.health.record_status(url, status, response.headers.get('Retry-After'))
+                    FETCHES.inc(host, fetch_result(status))
+                    yield response
+        except aiohttp.ClientResponseError:
+            # Already classified from the status line
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.health.record_failure(url, str(e) or type(e).__name__)
+            if status is None:
+                FETCHES.inc(host, fetch_result(error='timeout' if isinstance(e, asyncio.TimeoutError) else 'error'))
+            raise
+
+    async def close(self) -> None:
+        await self._session.close()
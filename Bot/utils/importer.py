@@ -0,0 +1,262 @@
+import codecs
+import csv
+import logging
+import queue
+import threading
+import time
+from html.parser import HTMLParser
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import IMPORT_COMMIT_BATCH, IMPORT_CONCURRENCY, IMPORT_PROGRESS_INTERVAL
+from .categorizer import get_categorizer
+from .fetcher import PipelineFull, get_pipeline
+from .storage import get_store
+from .urls import canonicalize_url, extract_urls, sanitize_url
+
+logger = logging.getLogger(__name__)
+
+# Links checked against the store with one query
+DEDUP_CHUNK = 500
+
+
+class BookmarkParser(HTMLParser):
+    """Collects ``(href, title)`` pairs from a Netscape bookmarks export as it is fed."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links: List[Tuple[str, str]] = []
+        self._href: Optional[str] = None
+        self._title: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            self._href = dict(attrs).get('href')
+            self._title = []
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._title.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self._href is not None:
+            self.links.append((self._href, ''.join(self._title).strip()))
+            self._href = None
+
+    def pop_links(self) -> List[Tuple[str, str]]:
+        links, self.links = self.links, []
+        return links
+
+
+def _decode(chunks: Iterable[bytes]) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def _lines(texts: Iterable[str]) -> Iterator[str]:
+    pending = ''
+    for text in texts:
+        pending += text
+        lines = pending.split('\n')
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def _csv_links(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    title_column = None
+    for number, row in enumerate(csv.reader(lines)):
+        urls = [url for cell in row for url in extract_urls(cell)]
+        if not urls:
+            if number == 0:
+                # Header row: remember where exports like Pocket or Raindrop keep titles
+                names = [cell.strip().lower() for cell in row]
+                title_column = next((names.index(name) for name in ('title', 'name') if name in names), None)
+            continue
+        title = row[title_column].strip() if title_column is not None and title_column < len(row) else ''
+        for url in urls:
+            yield url, title
+
+
+def iter_links(chunks: Iterable[bytes], filename: str = '') -> Iterator[Tuple[str, str]]:
+    """Yield ``(url, title)`` pairs from a downloaded file as its chunks arrive.
+
+    Bookmarks HTML (Netscape format, as exported by every browser) is parsed
+    incrementally and keeps each bookmark's title. CSV files take the title
+    from a ``title``/``name`` column when there is a header. Anything else is
+    read line by line as plain text. Titles are '' when unknown.
+    """
+    texts = _decode(chunks)
+    first = next(texts, '')
+    texts = _chain(first, texts)
+    name = filename.lower()
+
+    if name.endswith(('.html', '.htm')) or first.lstrip()[:100].upper().startswith(('<!DOCTYPE NETSCAPE', '<HTML')):
+        parser = BookmarkParser()
+        for text in texts:
+            parser.feed(text)
+            yield from parser.pop_links()
+        parser.close()
+        yield from parser.pop_links()
+    elif name.endswith('.csv'):
+        yield from _csv_links(_lines(texts))
+    else:
+        for line in _lines(texts):
+            for url in extract_urls(line):
+                yield url, ''
+
+
+def _chain(first: str, rest: Iterator[str]) -> Iterator[str]:
+    if first:
+        yield first
+    yield from rest
+
+
+class ImportStats:
+    """Running totals shown in the progress message."""
+
+    __slots__ = ('found', 'invalid', 'duplicates', 'saved', 'failed', 'started')
+
+    def __init__(self):
+        self.found = self.invalid = self.duplicates = self.saved = self.failed = 0
+        self.started = time.monotonic()
+
+    @property
+    def processed(self) -> int:
+        return self.invalid + self.duplicates + self.saved + self.failed
+
+
+class LinkImporter:
+    """Imports a stream of links into one chat.
+
+    Links are sanitized and canonicalized, and duplicates are dropped, both
+    within the file and against the store (one query per chunk). New links
+    go through the shared fetch pipeline, with at most ``concurrency`` in
+    flight. Fetched links are categorized and saved ``commit_batch`` at a
+    time in a single transaction. If a fetch fails, the bookmark's own title
+    is used when the file had one. ``on_progress(stats, done)`` is called at
+    most every ``progress_interval`` seconds and once at the end.
+    """
+
+    def __init__(self, chat_id: int, on_progress: Callable[[ImportStats, bool], None],
+                 concurrency: int = IMPORT_CONCURRENCY, commit_batch: int = IMPORT_COMMIT_BATCH,
+                 progress_interval: float = IMPORT_PROGRESS_INTERVAL):
+        self.chat_id = chat_id
+        self.on_progress = on_progress
+        self.commit_batch = commit_batch
+        self.progress_interval = progress_interval
+        self.stats = ImportStats()
+        self.store = get_store()
+        self.pipeline = get_pipeline()
+
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._results: "queue.Queue[Tuple[str, str, Dict[str, Any]]]" = queue.Queue()
+        self._pending = 0
+        self._buffer: List[Tuple[str, Dict[str, Any]]] = []
+        self._seen = set()
+        self._last_progress = 0.0
+
+    def run(self, links: Iterable[Tuple[str, str]]) -> ImportStats:
+        for url, title in self._new_links(links):
+            self._slots.acquire()
+            self._submit(url, title)
+            self._drain(block=False)
+        while self._pending:
+            self._drain(block=True)
+        self._flush()
+        self.on_progress(self.stats, True)
+        return self.stats
+
+    def _new_links(self, links: Iterable[Tuple[str, str]]) -> Iterator[Tuple[str, str]]:
+        links = iter(links)
+        while True:
+            chunk = list(islice(links, DEDUP_CHUNK))
+            if not chunk:
+                return
+            self.stats.found += len(chunk)
+
+            fresh = []
+            for url, title in chunk:
+                url = sanitize_url(url)
+                canonical = canonicalize_url(url) if url else ''
+                if not canonical:
+                    self.stats.invalid += 1
+                elif canonical in self._seen:
+                    self.stats.duplicates += 1
+                else:
+                    self._seen.add(canonical)
+                    fresh.append((url, title, canonical))
+
+            saved = self.store.existing_canonicals(self.chat_id, [canonical for _, _, canonical in fresh])
+            for url, title, canonical in fresh:
+                if canonical in saved:
+                    self.stats.duplicates += 1
+                else:
+                    yield url, title
+
+    def _submit(self, url: str, title: str) -> None:
+        def done(metadata):
+            self._results.put((url, title, metadata))
+            self._slots.release()
+
+        while True:
+            try:
+                self.pipeline.submit(url, done)
+                self._pending += 1
+                return
+            except PipelineFull:
+                # Interactive saves share the pipeline; leave them room and retry
+                self._drain(block=False)
+                time.sleep(0.2)
+
+    def _drain(self, block: bool) -> None:
+        try:
+            while True:
+                url, title, metadata = self._results.get(block=block, timeout=1 if block else None)
+                block = False
+                self._pending -= 1
+                self._collect(url, title, metadata)
+        except queue.Empty:
+            pass
+        self._report()
+
+    def _collect(self, url: str, title: str, metadata: Dict[str, Any]) -> None:
+        if 'error' in metadata:
+            if not title:
+                self.stats.failed += 1
+                return
+            metadata = {'title': title, 'description': ''}
+        elif title and not metadata.get('title'):
+            metadata = {**metadata, 'title': title}
+
+        self._buffer.append((url, metadata))
+        if len(self._buffer) >= self.commit_batch:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        categories = get_categorizer().classify([{'url': url, 'metadata': metadata} for url, metadata in batch])
+        ids = self.store.add_many(
+            self.chat_id,
+            ((url, metadata, category) for (url, metadata), category in zip(batch, categories))
+        )
+        self.stats.saved += len(ids)
+        self.stats.duplicates += len(batch) - len(ids)
+
+    def _report(self) -> None:
+        now = time.monotonic()
+        if now - self._last_progress >= self.progress_interval:
+            self._last_progress = now
+            try:
+                self.on_progress(self.stats, False)
+            except Exception as e:
+                logger.warning("Import progress update failed: %s", e)
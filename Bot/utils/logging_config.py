@@ -0,0 +1,138 @@
+import atexit
+import copy
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+from datetime import datetime, timezone
+from typing import Optional
+
+from config import (
+    LOG_BACKUP_COUNT,
+    LOG_FILE,
+    LOG_FORMAT,
+    LOG_LEVEL,
+    LOG_MAX_BYTES,
+    LOG_ROTATE_WHEN,
+    LOG_ROTATION,
+    LOGGING_FORMAT,
+)
+
+# Attributes every LogRecord has; anything else was passed with ``extra=`` and goes into JSON output
+_RECORD_FIELDS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and key not in entry:
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """Queues records for the listener thread without formatting them.
+
+    The stock handler renders the whole line (timestamp, traceback) on the
+    calling thread. Here only the message arguments are merged, since they
+    may change after the call. The formatting and the disk writes happen on
+    the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _gzip_namer(name: str) -> str:
+    return name + '.gz'
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, 'rb') as plain, gzip.open(dest, 'wb') as compressed:
+        shutil.copyfileobj(plain, compressed)
+    os.remove(source)
+
+
+def build_file_handler(log_file: str = LOG_FILE, rotation: str = LOG_ROTATION) -> logging.Handler:
+    """Create the rotating file handler; rotated files are gzipped as they are rolled over."""
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    if rotation == 'time':
+        handler = logging.handlers.TimedRotatingFileHandler(
+            log_file, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+        )
+    handler.namer = _gzip_namer
+    handler.rotator = _gzip_rotator
+    return handler
+
+
+def setup_logging(level: str = LOG_LEVEL, log_format: str = LOG_FORMAT,
+                  log_file: str = LOG_FILE) -> logging.handlers.QueueListener:
+    """Route all logging through a queue drained by one background listener.
+
+    Callers only put records on an unbounded queue, so a slow disk never
+    stalls a handler. The listener thread writes to the console and to
+    ``log_file``, and does the rotation and compression there too.
+    ``log_format`` is ``"text"`` or ``"json"``. Safe to call again; the
+    previous listener is stopped first.
+    """
+    global _listener
+    stop_logging()
+
+    formatter = JsonFormatter() if log_format == 'json' else logging.Formatter(LOGGING_FORMAT)
+    targets = [logging.StreamHandler(), build_file_handler(log_file)]
+    for handler in targets:
+        handler.setFormatter(formatter)
+
+    records: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(LogQueueHandler(records))
+    root.setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(records, *targets, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
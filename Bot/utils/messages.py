@@ -1,5 +1,7 @@
 SUCCESS_MESSAGES = {
+    'link_saving': "⏳ Saving link...",
     'link_added': "✅ Link successfully saved!\n\n*Title:* {title}",
+    'link_exists': "📌 You already saved this link!\n\n*Title:* {title}",
     'link_deleted': "🗑️ Successfully deleted:\n{items}",
     'operation_cancelled': "❌ Operation cancelled.",
     'list_updated': "📋 List has been updated!"
@@ -10,5 +12,8 @@ ERROR_MESSAGES = {
     'no_links': "📭 No links saved yet.",
     'invalid_number': "❌ Invalid number(s). Please choose from the list.",
     'general_error': "⚠️ Something went wrong! Please try again.",
+    'fetch_busy': "⏳ Too many links are being saved right now. Please try again in a moment.",
+    'rate_limited': "🐢 You're sending messages too quickly. Please slow down and try again in a moment.",
+    'fetch_rate_limited': "🐢 You're saving links too quickly. Please wait a bit and try again.",
     'metadata_error': "⚠️ Couldn't extract metadata from this URL. Please try another link."
 }
\ No newline at end of file
@@ -1,65 +1,170 @@
-import requests
-import sys
-import os
-from bs4 import BeautifulSoup
-import json
-from datetime import datetime
-from urllib.parse import urlparse
-import re
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+from urllib.parse import unquote, urlparse
 
-sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from config import FETCH_CHUNK_SIZE, FETCH_MAX_HEAD_BYTES, METADATA_CACHE_SIZE, METADATA_CACHE_TTL
+from .categorizer import get_categorizer
+from .metrics import CACHE_REQUESTS, STAGE_BYTES, STAGE_SECONDS, stage
+from .parsing import get_parser_pool
+from .storage import get_store
+from .urls import canonicalize_url, is_valid_url, sanitize_url
+
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
 
 def extract_metadata(url):
-    """Extract metadata from a given URL."""
-    try:
-        response = requests.get(url)
+    """Extract metadata from a given URL, blocking until the fetch pipeline is done."""
+    from .fetcher import get_pipeline
+    return get_pipeline().submit(url).result()
+
+class FetchResult(NamedTuple):
+    """Outcome of a single HTTP fetch. ``metadata`` is None for a 304."""
+    metadata: Optional[dict]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+async def fetch_document(client, url, etag=None, last_modified=None) -> FetchResult:
+    """Fetch a URL with an HTTP client and extract its metadata.
+
+    Only the document head is downloaded: the body is streamed until
+    ``</head>`` or ``FETCH_MAX_HEAD_BYTES``, and non-HTML responses are not
+    read at all. Passing validators makes the request conditional. The
+    head is parsed in the parser pool's worker processes.
+    """
+    started = time.perf_counter()
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    async with client.get(url, headers=headers) as response:
+        if response.status == 304:
+            STAGE_SECONDS.observe(time.perf_counter() - started, 'save', 'fetch')
+            return FetchResult(None, etag, last_modified)
         response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        metadata = {
-            'title': soup.title.string.strip() if soup.title else '',
-            'description': soup.find('meta', {'name': 'description'})['content'].strip() 
-                         if soup.find('meta', {'name': 'description'}) else ''
-        }
-        
-        # Store metadata in database.json
-        store_metadata(url, metadata)
-        
-        return metadata
-        
-    except Exception as e:
-        return {'error': str(e)}
-
-def store_metadata(url, metadata):
-    """Store metadata in database.json."""
-    db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database.json')
-    
-    try:
-        with open(db_path, 'r') as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        data = {}
-    
-    data[url] = {
-        'metadata': metadata,
-        'timestamp': datetime.now().isoformat()
+
+        validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        if response.content_type not in HTML_CONTENT_TYPES:
+            STAGE_SECONDS.observe(time.perf_counter() - started, 'save', 'fetch')
+            return FetchResult(describe_non_html(str(response.url), response.content_type), *validators)
+
+        head = await read_head(response.content)
+        header_charset = response.charset
+    STAGE_SECONDS.observe(time.perf_counter() - started, 'save', 'fetch')
+    STAGE_BYTES.inc('save', 'fetch', amount=len(head))
+
+    with stage('save', 'parse'):
+        metadata = await get_parser_pool().parse(head, header_charset)
+    return FetchResult(metadata, *validators)
+
+class CacheEntry:
+    __slots__ = ('metadata', 'etag', 'last_modified', 'fetched_at')
+
+    def __init__(self, result: FetchResult):
+        self.metadata = result.metadata
+        self.etag = result.etag
+        self.last_modified = result.last_modified
+        self.fetched_at = time.monotonic()
+
+class MetadataCache:
+    """LRU cache of fetched metadata keyed by canonical URL.
+
+    Entries are served directly for ``ttl`` seconds. After that they are
+    revalidated with a conditional GET, so an unchanged page costs a 304 and
+    no parsing. Concurrent lookups of the same URL share one fetch. The cache
+    is only used from the fetch pipeline's event loop and needs no locking.
+    """
+
+    def __init__(self, max_entries: int = METADATA_CACHE_SIZE, ttl: float = METADATA_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    async def fetch(self, client, url) -> dict:
+        """Return metadata for a URL, fetching or revalidating as needed."""
+        key = canonicalize_url(url) or url
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry.fetched_at < self.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            CACHE_REQUESTS.inc('metadata', 'hit')
+            return dict(entry.metadata)
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(client, url, key, entry))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # Shielded so one waiter timing out does not cancel the shared fetch
+        return dict(await asyncio.shield(task))
+
+    async def _load(self, client, url, key, entry: Optional[CacheEntry]) -> dict:
+        try:
+            if entry:
+                result = await fetch_document(client, url, entry.etag, entry.last_modified)
+            else:
+                result = await fetch_document(client, url)
+        except Exception as e:
+            if entry:
+                # Serve the stale copy rather than failing a known page
+                CACHE_REQUESTS.inc('metadata', 'stale')
+                return entry.metadata
+            self.misses += 1
+            CACHE_REQUESTS.inc('metadata', 'miss')
+            return {'error': str(e) or type(e).__name__}
+
+        if result.metadata is None:
+            self.revalidations += 1
+            CACHE_REQUESTS.inc('metadata', 'revalidated')
+            entry.fetched_at = time.monotonic()
+            self._store(key, entry)
+            return entry.metadata
+
+        self.misses += 1
+        CACHE_REQUESTS.inc('metadata', 'miss')
+        self._store(key, CacheEntry(result))
+        return result.metadata
+
+    def _store(self, key, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+async def read_head(stream, limit: int = FETCH_MAX_HEAD_BYTES) -> bytes:
+    """Read an HTML stream until the end of its head or ``limit`` bytes."""
+    buffer = bytearray()
+    async for chunk in stream.iter_chunked(FETCH_CHUNK_SIZE):
+        # Back up a few bytes so a tag split across chunks is still found
+        start = max(0, len(buffer) - 6)
+        buffer += chunk
+        end = buffer[start:].lower().find(b'</head')
+        if end != -1:
+            return bytes(buffer[:start + end])
+        if len(buffer) >= limit:
+            return bytes(buffer[:limit])
+    return bytes(buffer)
+
+def describe_non_html(url: str, content_type: str) -> dict:
+    """Build metadata for a non-HTML resource from its URL."""
+    parsed = urlparse(url)
+    filename = unquote(parsed.path.rstrip('/').rsplit('/', 1)[-1])
+    return {
+        'title': filename or parsed.netloc,
+        'description': content_type or ''
     }
-    
-    with open(db_path, 'w') as f:
-        json.dump(data, f, indent=4)
-
-def is_valid_url(url: str) -> bool:
-    """Validate URL format."""
-    try:
-        result = urlparse(url)
-        return all([result.scheme, result.netloc])
-    except Exception:
-        return False
-
-def sanitize_url(url: str) -> str:
-    """Clean and validate URL."""
-    url = url.strip()
-    if not url.startswith(('http://', 'https://')):
-        url = 'https://' + url
-    return url if is_valid_url(url) else ''
+
+def store_metadata(chat_id, url, metadata):
+    """Categorize a link and store it in the chat's partition of the link store."""
+    category = get_categorizer().categorize(url, metadata)
+    return get_store().add(chat_id, url, metadata, category=category)
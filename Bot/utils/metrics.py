@@ -0,0 +1,303 @@
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config import METRICS_HOST, METRICS_PORT
+
+# Latency bucket bounds in seconds, about 1.5x apart from 0.5ms to 60s
+LATENCY_BUCKETS: Tuple[float, ...] = tuple(round(0.0005 * 1.5 ** step, 6) for step in range(30))
+
+# Label value that collects series beyond a metric's ``max_series``
+OVERFLOW_LABEL = 'other'
+
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), max_series: int = 1000):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.max_series = max_series
+        self._lock = threading.Lock()
+
+    def _key(self, series: dict, values: Labels) -> Labels:
+        # Caps label cardinality (e.g. one series per host) so memory stays bounded
+        if values in series or len(series) < self.max_series:
+            return values
+        return (OVERFLOW_LABEL,) * len(values)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(_Metric):
+    """Monotonic count per label combination."""
+
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            key = self._key(self._values, labels)
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self) -> Dict[Labels, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        for labels, value in sorted(self.values().items()):
+            yield f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram: 'Histogram', labels: Labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> '_Timer':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+class Histogram(_Metric):
+    """Bucketed distribution per label combination, with quantile estimates.
+
+    An observation is a binary search over the bucket bounds plus two
+    increments under a lock, cheap enough to leave on for every request.
+    Quantiles are interpolated within the bucket they fall in, so they are
+    accurate to the bucket width (about 1.5x for :data:`LATENCY_BUCKETS`).
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets)
+        # Per series: counts per bucket (last one is +Inf), then the running sum
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            key = self._key(self._series, labels)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def time(self, *labels: str) -> _Timer:
+        """Return a context manager observing the time spent in its block."""
+        return _Timer(self, labels)
+
+    def series(self) -> Dict[Labels, Tuple[List[int], float]]:
+        with self._lock:
+            return {labels: (list(counts), total[0]) for labels, (counts, total) in self._series.items()}
+
+    def quantile(self, q: float, counts: Sequence[int]) -> float:
+        """Estimate the ``q`` quantile (0-1) from one series' bucket counts."""
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def summary(self) -> Dict[Labels, Dict[str, float]]:
+        """Return count, mean and p50/p95/p99 for every series."""
+        result = {}
+        for labels, (counts, total) in sorted(self.series().items()):
+            count = sum(counts)
+            result[labels] = {
+                'count': count,
+                'mean': total / count if count else 0.0,
+                'p50': self.quantile(0.50, counts),
+                'p95': self.quantile(0.95, counts),
+                'p99': self.quantile(0.99, counts),
+            }
+        return result
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        for labels, (counts, total) in sorted(self.series().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound!r}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}"
+
+
+class Gauge(_Metric):
+    """Value read from a callback when metrics are collected, e.g. a queue's length.
+
+    The callback returns a number, or a dict of label tuples to numbers for
+    a labelled gauge. Nothing is recorded on the hot path.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], object], labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self.read = read
+
+    def values(self) -> Dict[Labels, float]:
+        value = self.read()
+        return value if isinstance(value, dict) else {(): value}
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        for labels, value in sorted(self.values().items()):
+            yield f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self.started = time.time()
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = (), **kwargs) -> Counter:
+        return self.register(Counter(name, help_text, labels, **kwargs))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (), **kwargs) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, **kwargs))
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], object], labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, read, labels))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                lines.append(f"# {metric.name} unavailable: {e}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# Time per stage of each user-facing path: save (queue, fetch, parse, store, reply, total), list, delete
+STAGE_SECONDS = registry.histogram(
+    'metamind_stage_seconds', 'Time spent in each stage of handling a request', ('path', 'stage')
+)
+STAGE_BYTES = registry.counter(
+    'metamind_stage_bytes_total', 'Bytes read or sent by each stage', ('path', 'stage')
+)
+RATE_LIMITED = registry.counter(
+    'metamind_rate_limited_total', 'Updates and fetches refused by the rate limiter', ('limit',)
+)
+FETCHES = registry.counter(
+    'metamind_fetches_total', 'Page fetches by host and outcome', ('host', 'result'), max_series=2000
+)
+CACHE_REQUESTS = registry.counter(
+    'metamind_cache_requests_total', 'Cache lookups by cache and outcome', ('cache', 'result')
+)
+registry.gauge('metamind_uptime_seconds', 'Seconds since the bot started', lambda: time.time() - registry.started)
+
+
+def stage(path: str, name: str) -> _Timer:
+    """Time a block as one stage of a request path, e.g. ``with stage('list', 'query'):``."""
+    return STAGE_SECONDS.time(path, name)
+
+
+def fetch_result(status: Optional[int] = None, error: Optional[str] = None) -> str:
+    """Collapse a fetch outcome into a low-cardinality label."""
+    if error:
+        return error
+    if status is None:
+        return 'error'
+    if status == 304:
+        return 'not_modified'
+    return 'ok' if status < 400 else f"{status // 100}xx"
+
+
+class MetricsServer:
+    """Serves ``/metrics`` in the Prometheus text format from a background thread."""
+
+    def __init__(self, host: str = METRICS_HOST, port: int = METRICS_PORT, metrics: MetricsRegistry = registry):
+        self.metrics = metrics
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def start(self) -> 'MetricsServer':
+        threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
@@ -0,0 +1,208 @@
+import asyncio
+import codecs
+import importlib.util
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from html.parser import HTMLParser
+from typing import Optional
+
+from config import FETCH_CHUNK_SIZE, PARSE_BACKEND, PARSE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Seconds between a parser worker's checks that the bot process is still alive
+PARENT_CHECK_INTERVAL = 2
+
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+
+
+def detect_charset(header_charset, head: bytes) -> str:
+    """Pick the document encoding from the Content-Type header or a meta tag."""
+    match = META_CHARSET_PATTERN.search(head)
+    for candidate in (header_charset, match and match.group(1).decode('ascii', 'ignore')):
+        if not candidate:
+            continue
+        try:
+            return codecs.lookup(candidate).name
+        except LookupError:
+            continue
+    return 'utf-8'
+
+
+class HeadParser(HTMLParser):
+    """Tokenizer that keeps only the title and meta description and stops once it has both."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title_parts = []
+        self.in_title = False
+        self.title_done = False
+        self.description: Optional[str] = None
+        self.head_done = False
+
+    @property
+    def done(self) -> bool:
+        return self.head_done or (self.title_done and self.description is not None)
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title' and not self.title_done:
+            self.in_title = True
+        elif tag == 'meta' and self.description is None:
+            attributes = dict(attrs)
+            if (attributes.get('name') or '').lower() == 'description':
+                self.description = attributes.get('content') or ''
+        elif tag == 'body':
+            self.head_done = True
+
+    def handle_endtag(self, tag):
+        if tag == 'title' and self.in_title:
+            self.in_title = False
+            self.title_done = True
+        elif tag == 'head':
+            self.head_done = True
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title_parts.append(data)
+
+
+def parse_stream(head: bytes, charset: str) -> dict:
+    """Read the title and description with the stdlib tokenizer, stopping as early as possible."""
+    text = head.decode(charset, errors='replace')
+    parser = HeadParser()
+    for start in range(0, len(text), FETCH_CHUNK_SIZE):
+        parser.feed(text[start:start + FETCH_CHUNK_SIZE])
+        if parser.done:
+            break
+    return {
+        'title': ''.join(parser.title_parts).strip(),
+        'description': (parser.description or '').strip()
+    }
+
+
+def parse_lxml(head: bytes, charset: str) -> dict:
+    """Read the title and description with lxml's C parser."""
+    from lxml import html as lxml_html
+
+    # Re-encoded so libxml2 never has to understand Python's codec names
+    data = head.decode(charset, errors='replace').encode('utf-8')
+    if not data.strip():
+        return {'title': '', 'description': ''}
+    root = lxml_html.document_fromstring(data, parser=lxml_html.HTMLParser(encoding='utf-8'))
+    title = root.find('.//title')
+    descriptions = root.xpath(
+        "//meta[translate(@name, 'DESCRIPTION', 'description') = 'description']/@content"
+    )
+    return {
+        'title': title.text_content().strip() if title is not None else '',
+        'description': descriptions[0].strip() if descriptions else ''
+    }
+
+
+def parse_bs4(head: bytes, charset: str) -> dict:
+    """Read the title and description with BeautifulSoup's html.parser tree builder."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(head.decode(charset, errors='replace'), 'html.parser')
+    description = soup.find('meta', {'name': 'description'})
+
+    return {
+        'title': soup.title.string.strip() if soup.title and soup.title.string else '',
+        'description': description.get('content', '').strip() if description else ''
+    }
+
+
+PARSERS = {'stream': parse_stream, 'lxml': parse_lxml, 'bs4': parse_bs4}
+
+
+def parse_head(head: bytes, header_charset: Optional[str] = None, backend: str = PARSE_BACKEND) -> dict:
+    """Decode a document head and read its title and description; runs in the parser workers."""
+    return PARSERS[backend](head, detect_charset(header_charset, head))
+
+
+def _exit_with_parent(parent_pid: int) -> None:
+    """Worker initializer: exit once the bot process is gone, e.g. after a SIGKILL."""
+    def watch():
+        while os.getppid() == parent_pid:
+            time.sleep(PARENT_CHECK_INTERVAL)
+        os._exit(0)
+
+    threading.Thread(target=watch, name='parent-watch', daemon=True).start()
+
+
+class ParserPool:
+    """Parses document heads in worker processes, off the bot's GIL.
+
+    Workers receive the raw head bytes and return a small metadata dict,
+    so a burst of links spreads across cores while the Telegram threads
+    keep running. Workers are spawned rather than forked from the threaded
+    bot process, and exit on their own if the bot is killed. With
+    ``workers`` set to 0, parsing runs inline on the fetch thread. If a
+    worker dies, the pool is replaced and that document is parsed inline.
+    """
+
+    def __init__(self, workers: int = PARSE_WORKERS, backend: str = PARSE_BACKEND):
+        if backend not in PARSERS:
+            raise ValueError(f"Unknown PARSE_BACKEND {backend!r}, expected one of {', '.join(PARSERS)}")
+        if backend == 'lxml' and importlib.util.find_spec('lxml') is None:
+            logger.warning("PARSE_BACKEND is lxml but lxml is not installed; using the stream parser")
+            backend = 'stream'
+        self.workers = workers
+        self.backend = backend
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_exit_with_parent,
+                    initargs=(os.getpid(),)
+                )
+            return self._executor
+
+    async def parse(self, head: bytes, header_charset: Optional[str] = None) -> dict:
+        """Return the title and description of a document head."""
+        if not self.workers:
+            return parse_head(head, header_charset, self.backend)
+
+        executor = self._pool()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, parse_head, head, header_charset, self.backend
+            )
+        except BrokenProcessPool:
+            logger.warning("A parser worker died; restarting the parser pool")
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            return parse_head(head, header_charset, self.backend)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_parser_pool: Optional[ParserPool] = None
+_parser_pool_lock = threading.Lock()
+
+
+def get_parser_pool() -> ParserPool:
+    """Return the shared parser pool; its worker processes start with the first parse."""
+    global _parser_pool
+    if _parser_pool is None:
+        with _parser_pool_lock:
+            if _parser_pool is None:
+                _parser_pool = ParserPool()
+    return _parser_pool
@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from config import (
+    RATE_LIMIT_FETCH_BURST,
+    RATE_LIMIT_FETCH_RATE,
+    RATE_LIMIT_GLOBAL_BURST,
+    RATE_LIMIT_GLOBAL_RATE,
+    RATE_LIMIT_IDLE_TTL,
+    RATE_LIMIT_MAX_KEYS,
+    RATE_LIMIT_NOTICE_INTERVAL,
+    RATE_LIMIT_USER_BURST,
+    RATE_LIMIT_USER_RATE,
+)
+
+from .metrics import RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Holds up to ``burst`` tokens, refilled at ``rate`` tokens per second."""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float, now: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic() if now is None else now
+
+    def consume(self, cost: float = 1, now: Optional[float] = None) -> bool:
+        """Take ``cost`` tokens if available; return False without taking any otherwise."""
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < cost:
+            return False
+        self.tokens -= cost
+        return True
+
+    def refund(self, cost: float = 1) -> None:
+        self.tokens = min(self.burst, self.tokens + cost)
+
+
+class BucketRegistry:
+    """One token bucket per key, forgetting keys that have been idle for ``ttl``.
+
+    Buckets are kept in least-recently-used order, so expired ones are always
+    at the front and are dropped as a side effect of normal lookups. The TTL
+    is never shorter than the time a bucket takes to refill, so forgetting a
+    bucket never hands a user tokens they would not have had anyway.
+    ``max_keys`` caps memory even when many keys are active at once.
+    """
+
+    def __init__(self, rate: float, burst: float, ttl: float = RATE_LIMIT_IDLE_TTL,
+                 max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.ttl = max(ttl, burst / rate if rate > 0 else ttl)
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: Hashable, cost: float = 1) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket.consume(cost, now)
+
+    def refund(self, key: Hashable, cost: float = 1) -> None:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.refund(cost)
+
+    def _evict(self, now: float) -> None:
+        while self._buckets:
+            bucket = next(iter(self._buckets.values()))
+            if now - bucket.updated < self.ttl and len(self._buckets) < self.max_keys:
+                break
+            self._buckets.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RateLimiter:
+    """Per-user and global limits for incoming updates, plus a stricter fetch limit.
+
+    ``allow`` is checked for every update before it is dispatched. A user's
+    own bucket is charged first, so one user flooding the bot only uses up
+    their own tokens and not everyone's share of the global bucket.
+    ``allow_fetch`` guards link fetches, which cost far more than a reply.
+    ``should_notify`` lets a limited user be told to slow down at most once
+    per ``RATE_LIMIT_NOTICE_INTERVAL``, so the notices cannot become a flood
+    of their own.
+    """
+
+    def __init__(self):
+        self.users = BucketRegistry(RATE_LIMIT_USER_RATE, RATE_LIMIT_USER_BURST)
+        self.fetches = BucketRegistry(RATE_LIMIT_FETCH_RATE, RATE_LIMIT_FETCH_BURST)
+        self.global_bucket = TokenBucket(RATE_LIMIT_GLOBAL_RATE, RATE_LIMIT_GLOBAL_BURST)
+        if RATE_LIMIT_NOTICE_INTERVAL <= 0:
+            raise ValueError(f"RATE_LIMIT_NOTICE_INTERVAL must be greater than 0, got {RATE_LIMIT_NOTICE_INTERVAL}")
+        self.notices = BucketRegistry(1 / RATE_LIMIT_NOTICE_INTERVAL, 1)
+        self._global_lock = threading.Lock()
+
+    def allow(self, user_id: Optional[int]) -> bool:
+        """Return True if an update from ``user_id`` may be processed now."""
+        if user_id is not None and not self.users.consume(user_id):
+            RATE_LIMITED.inc('user')
+            return False
+
+        with self._global_lock:
+            allowed = self.global_bucket.consume()
+        if not allowed:
+            if user_id is not None:
+                self.users.refund(user_id)
+            RATE_LIMITED.inc('global')
+            logger.debug("Global update rate limit reached, dropping update")
+        return allowed
+
+    def allow_fetch(self, user_id: int) -> bool:
+        """Return True if ``user_id`` may start another link fetch now."""
+        if self.fetches.consume(user_id):
+            return True
+        RATE_LIMITED.inc('fetch')
+        return False
+
+    def should_notify(self, user_id: int) -> bool:
+        """Return True if ``user_id`` has not been told to slow down recently."""
+        return self.notices.consume(user_id)
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter, creating it on first use."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
@@ -0,0 +1,93 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from config import RENDER_CACHE_SIZE
+from .metrics import CACHE_REQUESTS
+from .storage import get_store
+
+
+def truncate(text: str, limit: int) -> str:
+    return f"{text[:limit]}..." if len(text) > limit else text
+
+
+def render_list_line(record: Dict[str, Any]) -> str:
+    """Render a link as shown by /list, without its number."""
+    metadata = record['metadata']
+    title = truncate(metadata.get('title') or 'No title', 50)
+    desc = truncate(metadata.get('description') or 'No description', 100)
+    return f"[{title}]({record['url']})\n└ _{desc}_"
+
+
+def render_delete_line(record: Dict[str, Any]) -> str:
+    """Render a link as shown by /del, without its number."""
+    title = truncate(record['metadata'].get('title') or 'No title', 50)
+    return f"[{title}]({record['url']})"
+
+
+RENDERERS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    'list': render_list_line,
+    'delete': render_delete_line,
+}
+
+
+class RenderCache:
+    """LRU cache of pre-rendered listing lines keyed by record id and style.
+
+    Lines carry no item number, so deleting one link never invalidates the
+    lines of the others. The cache follows store events: new links are
+    rendered on save, edited links re-rendered and deleted links dropped.
+    """
+
+    def __init__(self, max_entries: int = RENDER_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lines: "OrderedDict[Tuple[int, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_change(self, event: str, record: Dict[str, Any]) -> None:
+        """Storage listener keeping rendered lines in step with the store."""
+        with self._lock:
+            for style in RENDERERS:
+                self._lines.pop((record['id'], style), None)
+        if event in ('add', 'update'):
+            for style in RENDERERS:
+                self.line(record, style)
+
+    def line(self, record: Dict[str, Any], style: str) -> str:
+        """Return the rendered line for a record, rendering it on a miss."""
+        key = (record['id'], style)
+        with self._lock:
+            line = self._lines.get(key)
+            if line is not None:
+                self._lines.move_to_end(key)
+                CACHE_REQUESTS.inc('render', 'hit')
+                return line
+
+        CACHE_REQUESTS.inc('render', 'miss')
+
+        line = RENDERERS[style](record)
+        with self._lock:
+            self._lines[key] = line
+            while len(self._lines) > self.max_entries:
+                self._lines.popitem(last=False)
+        return line
+
+    def render_numbered(self, items: Iterable[Tuple[int, Dict[str, Any]]], style: str) -> str:
+        """Join ``(number, record)`` pairs into numbered lines."""
+        return "\n\n".join(f"*{number}.* {self.line(record, style)}" for number, record in items)
+
+
+_render_cache: Optional[RenderCache] = None
+_render_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> RenderCache:
+    """Return the shared render cache, subscribed to the link store."""
+    global _render_cache
+    if _render_cache is None:
+        with _render_cache_lock:
+            if _render_cache is None:
+                cache = RenderCache()
+                get_store().subscribe(cache.on_change)
+                _render_cache = cache
+    return _render_cache
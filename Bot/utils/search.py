@@ -0,0 +1,38 @@
+import re
+from typing import List
+
+TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+# Too common to help ranking; URL scheme noise included
+STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it', 'of',
+    'on', 'or', 'that', 'the', 'this', 'to', 'with', 'http', 'https', 'www', 'html', 'htm',
+})
+
+# Words of a query that are looked up; the rest are ignored
+MAX_QUERY_TERMS = 16
+
+# Shorter trailing words match too many terms as a prefix to be useful
+MIN_PREFIX_LENGTH = 3
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search terms, dropping stop words and repeats."""
+    terms = [token for token in TOKEN_RE.findall(text.lower()) if token not in STOP_WORDS]
+    return list(dict.fromkeys(terms))[:MAX_QUERY_TERMS]
+
+
+def build_match_query(text: str) -> str:
+    """Turn free text into an FTS5 MATCH expression matching any of its terms.
+
+    Every term is quoted, so user input can never be read as FTS5 syntax
+    (AND/NOT/NEAR, column filters, stray quotes). A long enough last term
+    also matches as a prefix, so a half-typed word still finds results.
+    """
+    terms = tokenize(text)
+    if not terms:
+        return ''
+    quoted = [f'"{term}"' for term in terms]
+    if len(terms[-1]) >= MIN_PREFIX_LENGTH:
+        quoted[-1] += '*'
+    return ' OR '.join(quoted)
@@ -0,0 +1,62 @@
+from array import array
+from typing import Optional
+
+from config import SELECTION_TTL
+from .state_store import get_state_store
+
+
+class SelectionSession:
+    """Numbered snapshot of a chat's links: item ``n`` is ``ids[n - 1]``.
+
+    ``source`` names the command that opened it (``'list'`` or ``'search'``),
+    since number replies use whichever of them ran last. ``category`` is
+    set when a /list was limited to one category.
+    """
+
+    __slots__ = ('ids', 'source', 'category')
+
+    def __init__(self, ids: array, source: str, category: Optional[str] = None):
+        self.ids = ids
+        self.source = source
+        self.category = category
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def resolve(self, number: int) -> Optional[int]:
+        """Return the record id shown as ``number``, or None if out of range."""
+        if 1 <= number <= len(self.ids):
+            return self.ids[number - 1]
+        return None
+
+
+class SessionRegistry:
+    """Per-chat selection sessions that expire ``ttl`` seconds after they were opened.
+
+    Sessions live in the shared state store under ``namespace``, so with
+    the sqlite backend any bot process can answer the chat's next page.
+    """
+
+    def __init__(self, namespace: str, ttl: float = SELECTION_TTL):
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def open(self, chat_id: int, ids: array, source: str = 'list',
+             category: Optional[str] = None) -> SelectionSession:
+        """Start a new numbering for a chat, replacing any previous one."""
+        state = {'ids': ids, 'source': source, 'category': category}
+        get_state_store().set(self.namespace, chat_id, state, self.ttl)
+        return SelectionSession(ids, source, category)
+
+    def get(self, chat_id: int, source: Optional[str] = None) -> Optional[SelectionSession]:
+        """Return the chat's live session, or None if it never existed or expired.
+
+        With ``source``, a session opened by another command counts as missing.
+        """
+        state = get_state_store().get(self.namespace, chat_id)
+        if state is None or (source is not None and state['source'] != source):
+            return None
+        return SelectionSession(state['ids'], state['source'], state['category'])
+
+    def close(self, chat_id: int) -> None:
+        get_state_store().delete(self.namespace, chat_id)
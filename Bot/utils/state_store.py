@@ -0,0 +1,175 @@
+import heapq
+import itertools
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from config import STATE_BACKEND, STATE_PURGE_INTERVAL, STATE_STORE_PATH
+
+logger = logging.getLogger(__name__)
+
+# Stale heap entries (from overwritten or deleted keys) tolerated before the heap is rebuilt
+HEAP_SLACK = 1024
+
+
+class MemoryStateStore:
+    """Conversation state kept in this process, expiring exactly at each entry's deadline.
+
+    Reads never return an entry past its TTL. Deadlines also sit in a
+    min-heap, so every call first pops whatever has expired, at O(log n)
+    per entry and without a periodic scan of all entries.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, Hashable], Tuple[float, Any]] = {}
+        # (expires_at, tiebreak, namespace, key); entries whose key was overwritten are skipped when popped
+        self._deadlines: List[Tuple[float, int, str, Hashable]] = []
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: Hashable) -> Optional[Any]:
+        """Return the live value stored under ``key``, or None."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get((namespace, key))
+        if entry is None or entry[0] <= now:
+            return None
+        return entry[1]
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: float) -> None:
+        """Store ``value`` under ``key`` for ``ttl`` seconds, replacing any previous value."""
+        now = time.monotonic()
+        expires_at = now + ttl
+        with self._lock:
+            self._expire(now)
+            self._entries[(namespace, key)] = (expires_at, value)
+            heapq.heappush(self._deadlines, (expires_at, next(self._order), namespace, key))
+            if len(self._deadlines) > 2 * len(self._entries) + HEAP_SLACK:
+                self._rebuild()
+
+    def delete(self, namespace: str, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop((namespace, key), None)
+
+    def purge(self) -> int:
+        """Drop every expired entry now and return how many were dropped."""
+        with self._lock:
+            return self._expire(time.monotonic())
+
+    def _expire(self, now: float) -> int:
+        expired = 0
+        while self._deadlines and self._deadlines[0][0] <= now:
+            expires_at, _, namespace, key = heapq.heappop(self._deadlines)
+            entry = self._entries.get((namespace, key))
+            if entry is not None and entry[0] <= now:
+                del self._entries[(namespace, key)]
+                expired += 1
+        return expired
+
+    def _rebuild(self) -> None:
+        self._deadlines = [
+            (expires_at, next(self._order), namespace, key)
+            for (namespace, key), (expires_at, _) in self._entries.items()
+        ]
+        heapq.heapify(self._deadlines)
+
+
+class SqliteStateStore:
+    """Conversation state in a SQLite database in WAL mode, shared by every process using the file.
+
+    Several bot workers pointed at the same ``path`` see each other's
+    state, so a chat's /del or /list can continue on any of them. Values
+    are pickled; the file is private to the bot. Expired rows are never
+    returned and are deleted at most every ``purge_interval`` seconds by
+    whichever process is writing.
+    """
+
+    def __init__(self, path: str = STATE_STORE_PATH, purge_interval: float = STATE_PURGE_INTERVAL):
+        self.path = path
+        self.purge_interval = purge_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+        # Other processes hold the write lock only briefly; wait for it rather than failing
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS states (
+                namespace TEXT NOT NULL,
+                key NOT NULL,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_states_expires ON states (expires_at)")
+
+    def get(self, namespace: str, key: Hashable) -> Optional[Any]:
+        """Return the live value stored under ``key``, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM states WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, time.time())
+            ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: float) -> None:
+        """Store ``value`` under ``key`` for ``ttl`` seconds, replacing any previous value."""
+        now = time.time()
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.execute(
+                "REPLACE INTO states (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, blob, now + ttl)
+            )
+            if now >= self._next_purge:
+                self._purge(now)
+
+    def delete(self, namespace: str, key: Hashable) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM states WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def purge(self) -> int:
+        """Delete every expired row now and return how many were deleted."""
+        with self._lock:
+            return self._purge(time.time())
+
+    def _purge(self, now: float) -> int:
+        self._next_purge = now + self.purge_interval
+        expired = self._conn.execute("DELETE FROM states WHERE expires_at <= ?", (now,)).rowcount
+        if expired:
+            logger.info("Purged %s expired conversation states", expired)
+        return expired
+
+
+def build_state_store(backend: str = STATE_BACKEND):
+    """Create the state store selected by ``STATE_BACKEND``."""
+    stores = {'memory': MemoryStateStore, 'sqlite': SqliteStateStore}
+    if backend not in stores:
+        raise ValueError(f"Unknown STATE_BACKEND {backend!r}, expected one of {', '.join(stores)}")
+    return stores[backend]()
+
+
+_state_store = None
+_state_store_lock = threading.Lock()
+
+
+def get_state_store():
+    """Return the shared state store, creating it on first use."""
+    global _state_store
+    if _state_store is None:
+        with _state_store_lock:
+            if _state_store is None:
+                _state_store = build_state_store()
+    return _state_store
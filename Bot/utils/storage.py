@@ -0,0 +1,692 @@
+import json
+import logging
+import os
+import sqlite3
+from array import array
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from config import DATABASE_PATH, LEGACY_OWNER_CHAT_ID, STORAGE_PATH
+from .search import build_match_query
+from .urls import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# bm25() column weights for links_fts: title, description, url, chat_id (scope only)
+SEARCH_WEIGHTS = (5.0, 2.0, 1.0, 0.0)
+
+
+class VersionConflict(Exception):
+    """Raised when a chat's links changed since the caller read its version."""
+
+
+def _backfill_canonical_urls(conn: sqlite3.Connection) -> None:
+    rows = conn.execute("SELECT id, url FROM links").fetchall()
+    conn.executemany(
+        "UPDATE links SET canonical_url = ? WHERE id = ?",
+        [(canonicalize_url(url) or url, record_id) for record_id, url in rows]
+    )
+
+
+# Each entry upgrades the schema by one version (tracked in PRAGMA user_version).
+# Steps are SQL statements or callables that receive the connection.
+MIGRATIONS = [
+    (
+        """
+        CREATE TABLE IF NOT EXISTS links (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL UNIQUE,
+            title TEXT NOT NULL DEFAULT '',
+            description TEXT NOT NULL DEFAULT '',
+            timestamp TEXT NOT NULL
+        )
+        """,
+    ),
+    # Partition links by owning chat. Rows that predate ownership get chat_id 0
+    # until they are claimed through LEGACY_OWNER_CHAT_ID.
+    (
+        """
+        CREATE TABLE links_by_chat (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER NOT NULL,
+            url TEXT NOT NULL,
+            title TEXT NOT NULL DEFAULT '',
+            description TEXT NOT NULL DEFAULT '',
+            timestamp TEXT NOT NULL,
+            UNIQUE (chat_id, url)
+        )
+        """,
+        """
+        INSERT INTO links_by_chat (id, chat_id, url, title, description, timestamp)
+        SELECT id, 0, url, title, description, timestamp FROM links
+        """,
+        "DROP TABLE links",
+        "ALTER TABLE links_by_chat RENAME TO links",
+        # Ids grow monotonically, so (chat_id, id) doubles as the per-chat
+        # insertion-time index used for listing.
+        "CREATE INDEX IF NOT EXISTS idx_links_chat_id ON links (chat_id, id)",
+    ),
+    # Duplicate detection: look links up by their canonical URL
+    (
+        "ALTER TABLE links ADD COLUMN canonical_url TEXT",
+        _backfill_canonical_urls,
+        "CREATE INDEX IF NOT EXISTS idx_links_canonical ON links (chat_id, canonical_url)",
+    ),
+    # Per-chat version, bumped by every delete, for optimistic concurrency
+    (
+        """
+        CREATE TABLE IF NOT EXISTS chat_versions (
+            chat_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+        """,
+    ),
+    # Full-text index over title, description and URL, kept in step by triggers
+    (
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS links_fts USING fts5(
+            title, description, url,
+            content='links', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER links_fts_insert AFTER INSERT ON links BEGIN
+            INSERT INTO links_fts (rowid, title, description, url)
+            VALUES (new.id, new.title, new.description, new.url);
+        END
+        """,
+        """
+        CREATE TRIGGER links_fts_delete AFTER DELETE ON links BEGIN
+            INSERT INTO links_fts (links_fts, rowid, title, description, url)
+            VALUES ('delete', old.id, old.title, old.description, old.url);
+        END
+        """,
+        """
+        CREATE TRIGGER links_fts_update AFTER UPDATE OF title, description, url ON links BEGIN
+            INSERT INTO links_fts (links_fts, rowid, title, description, url)
+            VALUES ('delete', old.id, old.title, old.description, old.url);
+            INSERT INTO links_fts (rowid, title, description, url)
+            VALUES (new.id, new.title, new.description, new.url);
+        END
+        """,
+        "INSERT INTO links_fts (links_fts) VALUES ('rebuild')",
+    ),
+    # Auto-assigned category; '' until the categorizer has seen the link
+    (
+        "ALTER TABLE links ADD COLUMN category TEXT NOT NULL DEFAULT ''",
+        "CREATE INDEX IF NOT EXISTS idx_links_category ON links (chat_id, category, id)",
+    ),
+    # Change feed for incremental exports: one row per record holding its latest
+    # change, re-sequenced on every write, so readers resume from a seq checkpoint
+    (
+        """
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            record_id INTEGER NOT NULL UNIQUE,
+            chat_id INTEGER NOT NULL,
+            op TEXT NOT NULL
+        )
+        """,
+        "INSERT INTO changes (record_id, chat_id, op) SELECT id, chat_id, 'upsert' FROM links ORDER BY id",
+        """
+        CREATE TRIGGER links_changes_insert AFTER INSERT ON links BEGIN
+            REPLACE INTO changes (record_id, chat_id, op) VALUES (new.id, new.chat_id, 'upsert');
+        END
+        """,
+        """
+        CREATE TRIGGER links_changes_update AFTER UPDATE ON links BEGIN
+            REPLACE INTO changes (record_id, chat_id, op) VALUES (new.id, new.chat_id, 'upsert');
+        END
+        """,
+        """
+        CREATE TRIGGER links_changes_delete AFTER DELETE ON links BEGIN
+            REPLACE INTO changes (record_id, chat_id, op) VALUES (old.id, old.chat_id, 'delete');
+        END
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS export_checkpoints (
+            name TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL
+        )
+        """,
+    ),
+    # Index each link's chat id as a term too, so a search intersects with the
+    # chat's own postings instead of ranking matches from every chat
+    (
+        "DROP TRIGGER links_fts_insert",
+        "DROP TRIGGER links_fts_delete",
+        "DROP TRIGGER links_fts_update",
+        "DROP TABLE links_fts",
+        """
+        CREATE VIRTUAL TABLE links_fts USING fts5(
+            title, description, url, chat_id,
+            content='links', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER links_fts_insert AFTER INSERT ON links BEGIN
+            INSERT INTO links_fts (rowid, title, description, url, chat_id)
+            VALUES (new.id, new.title, new.description, new.url, new.chat_id);
+        END
+        """,
+        """
+        CREATE TRIGGER links_fts_delete AFTER DELETE ON links BEGIN
+            INSERT INTO links_fts (links_fts, rowid, title, description, url, chat_id)
+            VALUES ('delete', old.id, old.title, old.description, old.url, old.chat_id);
+        END
+        """,
+        """
+        CREATE TRIGGER links_fts_update AFTER UPDATE OF title, description, url, chat_id ON links BEGIN
+            INSERT INTO links_fts (links_fts, rowid, title, description, url, chat_id)
+            VALUES ('delete', old.id, old.title, old.description, old.url, old.chat_id);
+            INSERT INTO links_fts (rowid, title, description, url, chat_id)
+            VALUES (new.id, new.title, new.description, new.url, new.chat_id);
+        END
+        """,
+        "INSERT INTO links_fts (links_fts) VALUES ('rebuild')",
+    ),
+]
+
+
+class LinkStore:
+    """SQLite-backed repository for saved links.
+
+    Links are partitioned by ``chat_id``. Every operation touches only the
+    requesting chat's rows through the ``(chat_id, url)`` and ``(chat_id, id)``
+    indexes, so its cost does not depend on how many links other chats keep.
+
+    Listeners registered with :meth:`subscribe` are called with
+    ``(event, record)`` after each committed ``'add'``, ``'update'`` or
+    ``'delete'`` so derived views can be maintained incrementally.
+    """
+
+    def __init__(self, path: str = STORAGE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+
+    @contextmanager
+    def _transaction(self):
+        """Run a block as a single write transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _migrate(self) -> None:
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        for index, statements in enumerate(MIGRATIONS[version:], version + 1):
+            with self._transaction() as conn:
+                for statement in statements:
+                    if callable(statement):
+                        statement(conn)
+                    else:
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {index}")
+            logger.info("Storage schema upgraded to version %s", index)
+
+    def subscribe(self, listener: Callable[[str, Dict[str, Any]], None]) -> None:
+        """Register a callback for committed changes."""
+        self._listeners.append(listener)
+
+    def _notify(self, event: str, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            for listener in self._listeners:
+                try:
+                    listener(event, record)
+                except Exception as e:
+                    logger.error("Storage listener failed on %s: %s", event, e, exc_info=True)
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            'id': row['id'],
+            'chat_id': row['chat_id'],
+            'url': row['url'],
+            'metadata': {
+                'title': row['title'],
+                'description': row['description'],
+            },
+            'timestamp': row['timestamp'],
+            'category': row['category'],
+        }
+
+    def add(self, chat_id: int, url: str, metadata: Dict[str, Any],
+            timestamp: Optional[str] = None, category: str = '') -> int:
+        """Insert or update a chat's link and return its record id.
+
+        A URL whose canonical form is already stored updates that record
+        instead of adding a near-duplicate. If its title and description are
+        unchanged the record is left as it is, keeping its timestamp and the
+        category a batch pass may have given it.
+        """
+        timestamp = timestamp or datetime.now().isoformat()
+        canonical = canonicalize_url(url) or url
+        values = (metadata.get('title', ''), metadata.get('description', ''), timestamp, category)
+
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id, title, description FROM links WHERE chat_id = ? AND canonical_url = ? ORDER BY id LIMIT 1",
+                (chat_id, canonical)
+            ).fetchone()
+            if row and (row['title'], row['description']) == values[:2]:
+                return row['id']
+            if row:
+                event, record_id = 'update', row['id']
+                conn.execute(
+                    "UPDATE links SET title = ?, description = ?, timestamp = ?, category = ? WHERE id = ?",
+                    (*values, record_id)
+                )
+            else:
+                event = 'add'
+                record_id = conn.execute(
+                    """
+                    INSERT INTO links (chat_id, url, canonical_url, title, description, timestamp, category)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (chat_id, url, canonical, *values)
+                ).lastrowid
+            record = self._to_record(
+                conn.execute("SELECT * FROM links WHERE id = ?", (record_id,)).fetchone()
+            )
+
+        self._notify(event, [record])
+        return record_id
+
+    def add_many(self, chat_id: int, links: Iterable[tuple]) -> List[int]:
+        """Insert ``(url, metadata, category)`` links in one transaction; return the new ids.
+
+        Links whose canonical URL the chat already has are skipped.
+        """
+        timestamp = datetime.now().isoformat()
+        records = []
+        with self._transaction() as conn:
+            for url, metadata, category in links:
+                canonical = canonicalize_url(url) or url
+                if conn.execute(
+                    "SELECT 1 FROM links WHERE chat_id = ? AND canonical_url = ? LIMIT 1", (chat_id, canonical)
+                ).fetchone():
+                    continue
+                record_id = conn.execute(
+                    """
+                    INSERT INTO links (chat_id, url, canonical_url, title, description, timestamp, category)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (chat_id, url, canonical, metadata.get('title', ''), metadata.get('description', ''),
+                     timestamp, category)
+                ).lastrowid
+                records.append(self._to_record(
+                    conn.execute("SELECT * FROM links WHERE id = ?", (record_id,)).fetchone()
+                ))
+
+        self._notify('add', records)
+        return [record['id'] for record in records]
+
+    def update_metadata(self, chat_id: int, record_id: int, metadata: Dict[str, Any],
+                        expected: Optional[Dict[str, Any]] = None) -> bool:
+        """Replace a record's title and description; return False if nothing was updated.
+
+        With ``expected`` the update only applies while the record still holds
+        that title and description, so a slow background writer cannot
+        overwrite metadata saved after it started.
+        """
+        query = "UPDATE links SET title = ?, description = ? WHERE chat_id = ? AND id = ?"
+        params = [metadata.get('title', ''), metadata.get('description', ''), chat_id, record_id]
+        if expected is not None:
+            query += " AND title = ? AND description = ?"
+            params += [expected.get('title', ''), expected.get('description', '')]
+
+        with self._transaction() as conn:
+            if not conn.execute(query, params).rowcount:
+                return False
+            record = self._to_record(
+                conn.execute("SELECT * FROM links WHERE id = ?", (record_id,)).fetchone()
+            )
+
+        self._notify('update', [record])
+        return True
+
+    def get(self, chat_id: int, url: str) -> Optional[Dict[str, Any]]:
+        """Return a chat's stored record for a URL, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM links WHERE chat_id = ? AND url = ?", (chat_id, url)
+            ).fetchone()
+        return self._to_record(row) if row else None
+
+    def get_many(self, chat_id: int, ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Return a chat's records for the given ids, keyed by id; missing ids are omitted."""
+        ids = list(ids)
+        if not ids:
+            return {}
+
+        placeholders = ','.join('?' * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM links WHERE chat_id = ? AND id IN ({placeholders})", (chat_id, *ids)
+            ).fetchall()
+        return {row['id']: self._to_record(row) for row in rows}
+
+    def ids(self, chat_id: int, category: Optional[str] = None) -> array:
+        """Return a chat's record ids in insertion order as a compact array.
+
+        With ``category`` only links in that category are included.
+        """
+        query, params = "SELECT id FROM links WHERE chat_id = ?", [chat_id]
+        if category is not None:
+            query += " AND category = ?"
+            params.append(category)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY id", params).fetchall()
+        return array('q', (row[0] for row in rows))
+
+    def categories(self, chat_id: int) -> List[tuple]:
+        """Return ``(category, count)`` pairs for a chat's categorized links, largest first."""
+        with self._lock:
+            return [tuple(row) for row in self._conn.execute(
+                """
+                SELECT category, COUNT(*) AS links FROM links
+                WHERE chat_id = ? AND category != ''
+                GROUP BY category ORDER BY links DESC, category
+                """,
+                (chat_id,)
+            )]
+
+    def iter_for_categorizing(self, batch_size: int = 5000,
+                              only_missing: bool = True) -> Iterator[List[Dict[str, Any]]]:
+        """Yield batches of records from all chats, optionally only uncategorized ones."""
+        query = "SELECT * FROM links WHERE id > ?"
+        if only_missing:
+            query += " AND category = ''"
+        query += " ORDER BY id LIMIT ?"
+
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(query, (last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            yield [self._to_record(row) for row in rows]
+            last_id = rows[-1]['id']
+
+    def set_categories(self, assignments: Iterable[tuple]) -> None:
+        """Store ``(record_id, category)`` pairs in one transaction.
+
+        Rows whose category is already set to the same value are left alone,
+        so a re-categorize pass does not feed unchanged links to the exporter.
+        """
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE links SET category = ? WHERE id = ? AND category IS NOT ?",
+                ((category, record_id, category) for record_id, category in assignments)
+            )
+
+    def find_canonical(self, chat_id: int, url: str) -> Optional[Dict[str, Any]]:
+        """Return the chat's record for any URL with the same canonical form, or None."""
+        canonical = canonicalize_url(url) or url
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM links WHERE chat_id = ? AND canonical_url = ? ORDER BY id LIMIT 1",
+                (chat_id, canonical)
+            ).fetchone()
+        return self._to_record(row) if row else None
+
+    def existing_canonicals(self, chat_id: int, canonicals: Iterable[str]) -> set:
+        """Return which of the given canonical URLs the chat has already saved."""
+        canonicals = list(canonicals)
+        found = set()
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(canonicals), 500):
+            chunk = canonicals[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            with self._lock:
+                found.update(row[0] for row in self._conn.execute(
+                    f"SELECT canonical_url FROM links WHERE chat_id = ? AND canonical_url IN ({placeholders})",
+                    (chat_id, *chunk)
+                ))
+        return found
+
+    def version(self, chat_id: int) -> int:
+        """Return the chat's current version.
+
+        Saves only append new ids and never renumber an existing snapshot, so
+        only deletions bump the version.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM chat_versions WHERE chat_id = ?", (chat_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def delete_many(self, chat_id: int, ids: Iterable[int],
+                    expected_version: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Delete a chat's links by id as one atomic batch and return the removed records.
+
+        When ``expected_version`` is given the batch only applies if no other
+        delete happened in the chat since that version was read; otherwise
+        :class:`VersionConflict` is raised and nothing is deleted.
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return []
+
+        placeholders = ','.join('?' * len(ids))
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT version FROM chat_versions WHERE chat_id = ?", (chat_id,)
+            ).fetchone()
+            current = row[0] if row else 0
+            if expected_version is not None and current != expected_version:
+                raise VersionConflict(f"chat {chat_id} is at version {current}, expected {expected_version}")
+
+            rows = conn.execute(
+                f"SELECT * FROM links WHERE chat_id = ? AND id IN ({placeholders}) ORDER BY id",
+                (chat_id, *ids)
+            ).fetchall()
+            conn.execute(
+                f"DELETE FROM links WHERE chat_id = ? AND id IN ({placeholders})", (chat_id, *ids)
+            )
+            conn.execute(
+                """
+                INSERT INTO chat_versions (chat_id, version) VALUES (?, 1)
+                ON CONFLICT(chat_id) DO UPDATE SET version = version + 1
+                """,
+                (chat_id,)
+            )
+
+        deleted = [self._to_record(row) for row in rows]
+        self._notify('delete', deleted)
+        return deleted
+
+    def iter_page(self, chat_id: int, offset: int = 0, limit: int = 20) -> Iterator[Dict[str, Any]]:
+        """Yield a chat's records in insertion order, starting at ``offset``."""
+        # Skip ahead on the (chat_id, id) index alone, then read full rows for the page
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT * FROM links WHERE id IN (
+                    SELECT id FROM links WHERE chat_id = ? ORDER BY id LIMIT ? OFFSET ?
+                )
+                ORDER BY id
+                """,
+                (chat_id, limit, offset)
+            ).fetchall()
+        for row in rows:
+            yield self._to_record(row)
+
+    def search(self, chat_id: int, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Return a chat's links matching any word of ``query``, best BM25 match first."""
+        match = build_match_query(query)
+        if not match:
+            return []
+
+        # The chat id term limits matching and bm25() to the chat's own rows. It
+        # is tokenized without its sign, so the join still checks the exact chat.
+        match = f'chat_id : "{abs(chat_id)}" AND {{title description url}} : ({match})'
+
+        # Rank on ids alone, then read the full rows of the winners only
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute(
+                f"""
+                SELECT links_fts.rowid FROM links_fts JOIN links ON links.id = links_fts.rowid
+                WHERE links_fts MATCH ? AND links.chat_id = ?
+                ORDER BY bm25(links_fts, {', '.join(map(str, SEARCH_WEIGHTS))}), links.id DESC
+                LIMIT ?
+                """,
+                (match, chat_id, limit)
+            )]
+        records = self.get_many(chat_id, ids)
+        return [records[record_id] for record_id in ids if record_id in records]
+
+    def changes_since(self, seq: int, limit: int = 500) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` changes after ``seq`` in order, across all chats.
+
+        Each change is a record dict plus ``seq`` and ``op`` (``'upsert'`` or
+        ``'delete'``); deletes carry only the id and chat id. A record
+        changed several times appears once, at its latest position.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT changes.seq, changes.op, changes.record_id, changes.chat_id,
+                       links.url, links.title, links.description, links.timestamp, links.category
+                FROM changes LEFT JOIN links ON links.id = changes.record_id
+                WHERE changes.seq > ? ORDER BY changes.seq LIMIT ?
+                """,
+                (seq, limit)
+            ).fetchall()
+        return [
+            {
+                'seq': row['seq'],
+                'op': row['op'],
+                'id': row['record_id'],
+                'chat_id': row['chat_id'],
+                'url': row['url'],
+                'metadata': {'title': row['title'], 'description': row['description']},
+                'timestamp': row['timestamp'],
+                'category': row['category'],
+            }
+            for row in rows
+        ]
+
+    def export_checkpoint(self, name: str) -> int:
+        """Return the last change seq an exporter has confirmed, or 0."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT seq FROM export_checkpoints WHERE name = ?", (name,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def save_export_checkpoint(self, name: str, seq: int) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO export_checkpoints (name, seq) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET seq = excluded.seq
+                """,
+                (name, seq)
+            )
+
+    def prune_changes(self) -> int:
+        """Drop delete markers every exporter has already passed; return how many."""
+        with self._transaction() as conn:
+            oldest = conn.execute("SELECT MIN(seq) FROM export_checkpoints").fetchone()[0]
+            if oldest is None:
+                # No exporter has ever run, so no one needs to hear about deletes
+                cursor = conn.execute("DELETE FROM changes WHERE op = 'delete'")
+            else:
+                cursor = conn.execute("DELETE FROM changes WHERE op = 'delete' AND seq <= ?", (oldest,))
+        return cursor.rowcount
+
+    def count(self, chat_id: int) -> int:
+        """Return the number of links stored by a chat."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM links WHERE chat_id = ?", (chat_id,)
+            ).fetchone()[0]
+
+    def assign_orphans(self, chat_id: int) -> int:
+        """Hand links saved before per-chat ownership over to ``chat_id``."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE OR IGNORE links SET chat_id = ? WHERE chat_id = 0", (chat_id,)
+            )
+        if cursor.rowcount:
+            logger.info("Assigned %s legacy links to chat %s", cursor.rowcount, chat_id)
+        return cursor.rowcount
+
+    def migrate_json(self, json_path: str = DATABASE_PATH) -> int:
+        """Import a legacy ``database.json`` once and rename it out of the way.
+
+        The legacy file has no owners, so its links are stored under chat 0
+        until :meth:`assign_orphans` claims them.
+        """
+        if not os.path.exists(json_path):
+            return 0
+
+        try:
+            with open(json_path, 'r') as f:
+                data = json.load(f)
+        except json.JSONDecodeError as e:
+            logger.error("Legacy database is not valid JSON, skipping migration: %s", e)
+            return 0
+
+        rows = [
+            (
+                0,
+                url,
+                canonicalize_url(url) or url,
+                info.get('metadata', {}).get('title', ''),
+                info.get('metadata', {}).get('description', ''),
+                info.get('timestamp') or datetime.now().isoformat(),
+            )
+            for url, info in data.items()
+        ]
+
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO links (chat_id, url, canonical_url, title, description, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+        os.replace(json_path, json_path + '.migrated')
+        logger.info("Migrated %s links from %s", len(rows), json_path)
+        return len(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[LinkStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> LinkStore:
+    """Return the shared link store, migrating the legacy JSON file on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = LinkStore()
+                store.migrate_json()
+                if LEGACY_OWNER_CHAT_ID:
+                    store.assign_orphans(LEGACY_OWNER_CHAT_ID)
+                _store = store
+    return _store
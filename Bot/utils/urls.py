@@ -0,0 +1,74 @@
+import re
+from typing import List, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+URL_PATTERN = re.compile(r'https?://[^\s<>"\'`]+', re.IGNORECASE)
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid',
+    'mc_cid', 'mc_eid', '_hsenc', '_hsmi', 'ref_src',
+}
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def _trim_url(url: str) -> str:
+    url = url.rstrip('.,;:!?\'"')
+    # Drop a closing bracket that belongs to the surrounding text
+    while url[-1] in ')]}' and url.count(url[-1]) > url.count({')': '(', ']': '[', '}': '{'}[url[-1]]):
+        url = url[:-1]
+    return url
+
+def extract_url(text: str) -> Optional[str]:
+    """Extract the first URL, including its path and query, from message text."""
+    match = URL_PATTERN.search(text)
+    return _trim_url(match.group(0)) if match else None
+
+def extract_urls(text: str) -> List[str]:
+    """Extract every URL in a piece of text, in order."""
+    return [_trim_url(match) for match in URL_PATTERN.findall(text)]
+
+def is_valid_url(url: str) -> bool:
+    """Validate URL format."""
+    try:
+        result = urlparse(url)
+        return all([result.scheme, result.netloc])
+    except Exception:
+        return False
+
+def sanitize_url(url: str) -> str:
+    """Clean and validate URL."""
+    url = url.strip()
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url if is_valid_url(url) else ''
+
+def canonicalize_url(url: str) -> str:
+    """Reduce a URL to the form used to detect duplicates.
+
+    Scheme, ``www.``, default ports, fragments, trailing slashes, tracking
+    parameters and query order do not distinguish pages. Returns an empty
+    string for invalid URLs.
+    """
+    url = sanitize_url(url)
+    if not url:
+        return ''
+
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    try:
+        port = parsed.port
+    except ValueError:
+        return ''
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+
+    path = parsed.path.rstrip('/') or '/'
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+
+    return urlunparse(('https', host, path, parsed.params, urlencode(query), ''))
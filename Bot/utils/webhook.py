@@ -0,0 +1,97 @@
+import hmac
+import ipaddress
+import logging
+import queue
+import threading
+
+from aiohttp import web
+from telebot.types import Update
+
+from config import (
+    WEBHOOK_HOST,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+    WEBHOOK_QUEUE_SIZE,
+    WEBHOOK_SECRET,
+    WEBHOOK_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+def is_loopback(host: str) -> bool:
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class WebhookServer:
+    """Receives Telegram updates over HTTP and hands them to worker threads.
+
+    The aiohttp handler only validates and queues each update, so Telegram
+    gets its 200 right away. Worker threads drain the queue into
+    ``bot.process_new_updates``. When the queue is full the server answers
+    503 and Telegram redelivers the update later.
+
+    Without a ``secret`` anyone who can reach the port could post forged
+    updates for any chat, so that is only allowed on a loopback host
+    (e.g. for a local test sender).
+    """
+
+    def __init__(self, bot, host: str = WEBHOOK_HOST, port: int = WEBHOOK_PORT,
+                 path: str = WEBHOOK_PATH, secret: str = WEBHOOK_SECRET,
+                 workers: int = WEBHOOK_WORKERS, queue_size: int = WEBHOOK_QUEUE_SIZE):
+        if not secret and not is_loopback(host):
+            raise ValueError("WEBHOOK_SECRET is required unless WEBHOOK_HOST is a loopback address")
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.path = path
+        self.secret = secret
+        self.workers = workers
+        self.updates: queue.Queue = queue.Queue(maxsize=queue_size)
+
+        self.app = web.Application()
+        self.app.router.add_post(path, self._receive)
+
+    async def _receive(self, request: web.Request) -> web.Response:
+        if self.secret and not hmac.compare_digest(request.headers.get(SECRET_HEADER, ''), self.secret):
+            return web.Response(status=403)
+
+        try:
+            update = Update.de_json(await request.json())
+        except Exception as e:
+            logger.warning("Rejected malformed webhook update: %s", e)
+            return web.Response(status=400)
+
+        try:
+            self.updates.put_nowait(update)
+        except queue.Full:
+            logger.warning("Webhook queue full, asking Telegram to retry")
+            return web.Response(status=503)
+        return web.Response()
+
+    def _drain(self) -> None:
+        while True:
+            update = self.updates.get()
+            try:
+                self.bot.process_new_updates([update])
+            except Exception as e:
+                logger.error("Error processing update %s: %s", update.update_id, e, exc_info=True)
+            finally:
+                self.updates.task_done()
+
+    def start_workers(self) -> None:
+        for index in range(self.workers):
+            threading.Thread(target=self._drain, name=f'webhook-worker-{index}', daemon=True).start()
+
+    def serve_forever(self) -> None:
+        """Start the workers and run the HTTP server until interrupted."""
+        self.start_workers()
+        logger.info("Webhook server listening on %s:%s%s", self.host, self.port, self.path)
+        web.run_app(self.app, host=self.host, port=self.port, print=None, access_log=None)
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# main.py imports its siblings (config, utils, handlers) as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Bot'))
+
+from main import main
+
+if __name__ == "__main__":
+    main()